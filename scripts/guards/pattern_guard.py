@@ -1,7 +1,21 @@
+"""Repository pattern guard.
+
+Scans Python sources for banned patterns with one combined regex per file.
+The stdlib ``re`` engine is used on purpose: the rules rely on lookaround,
+which RE2-style DFA engines do not support, and every rule starts with a
+literal and has no nested quantifiers, so scanning stays linear in file size.
+"""
+
 from __future__ import annotations
 
+import hashlib
+import json
+import os
 import re
-from collections.abc import Iterable
+import sys
+import tempfile
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[2]
@@ -12,74 +26,133 @@ TARGET_DIRS = [
     ROOT / "tests",
 ]
 
-EXCLUDE_DIRNAMES = {".venv", "__pycache__", "node_modules"}
+EXCLUDE_DIRNAMES = {".git", ".venv", "__pycache__", "node_modules"}
 ALLOW_EXT = {".py"}
 
+# Larger files are reported and skipped rather than read into memory; a NUL
+# byte in the first SNIFF_BYTES marks a file as binary.
+SIZE_LIMIT = 2 * 1024 * 1024
+SNIFF_BYTES = 4096
+
 # Build suppression tokens without embedding the literal words in this file.
-_SUP_PREFIX = "sup"
-_PRESS_PART = "press"
-_RESS_PART = "ress"
-
-PATTERNS: dict[str, re.Pattern[str]] = {
-    "typing.Any": re.compile(r"\btyping\.Any\b"),
-    "Any import": re.compile(r"\bfrom\s+typing\s+import\b[^#\n]*\bAny\b"),
-    "Any usage": re.compile(r"(?<!\w)Any(?!\w)"),
-    "type: ignore": re.compile(r"type:\s*ignore"),
-    "typing.cast": re.compile(r"\btyping\.cast\b"),
-    "TODO": re.compile(r"\bTODO\b"),
-    "FIXME": re.compile(r"\bFIXME\b"),
-    "HACK": re.compile(r"\bHACK\b"),
-    "XXX": re.compile(r"\bXXX\b"),
-    "WIP": re.compile(r"\bWIP\b"),
-    "logging.basicConfig": re.compile(r"\blogging\.basicConfig\s*\("),
-    "noqa": re.compile(r"#\s*noqa\b"),
+_SUP_PREFIX = b"sup"
+_PRESS_PART = b"press"
+_RESS_PART = b"ress"
+
+PATTERNS: dict[str, re.Pattern[bytes]] = {
+    "typing.Any": re.compile(rb"\btyping\.Any\b"),
+    "Any import": re.compile(rb"\bfrom[^\S\n]+typing[^\S\n]+import\b[^#\n]*\bAny\b"),
+    "Any usage": re.compile(rb"(?<!\w)Any(?!\w)"),
+    "type: ignore": re.compile(rb"type:[^\S\n]*ignore"),
+    "typing.cast": re.compile(rb"\btyping\.cast\b"),
+    "TODO": re.compile(rb"\bTODO\b"),
+    "FIXME": re.compile(rb"\bFIXME\b"),
+    "HACK": re.compile(rb"\bHACK\b"),
+    "XXX": re.compile(rb"\bXXX\b"),
+    "WIP": re.compile(rb"\bWIP\b"),
+    "logging.basicConfig": re.compile(rb"\blogging\.basicConfig[^\S\n]*\("),
+    "noqa": re.compile(rb"#[^\S\n]*noqa\b"),
     # Audit generic sup/press helpers (contextlib or custom).
-    "sup-helper": re.compile(rf"(?i)({_SUP_PREFIX}{_PRESS_PART}|{_SUP_PREFIX}{_RESS_PART})"),
+    "sup-helper": re.compile(
+        b"(?i:" + _SUP_PREFIX + _PRESS_PART + b"|" + _SUP_PREFIX + _RESS_PART + b")"
+    ),
+    # A print( call at the start of a line or after whitespace; (?<!\S) covers
+    # both the line start and a preceding blank on whole-file text.
+    "print() in library code": re.compile(rb"(?<!\S)print[^\S\n]*\("),
 }
 
+# Rules that do not apply to files under tests/.
+_ALLOWED_IN_TESTS = frozenset({"noqa", "print() in library code"})
+
+# Patterns are matched against whole-file text, so whitespace classes exclude
+# newlines to keep every match on a single line. Group names must be
+# identifiers; map them back to the pattern index and name for reporting.
+_GROUPS: dict[str, tuple[int, str]] = {f"p{i}": (i, name) for i, name in enumerate(PATTERNS)}
+
+# Every byte a rule can start with (both cases for the case-insensitive one).
+# Most offsets in a file start with some other byte and are rejected by one
+# class test before any per-rule lookahead runs. Keep in sync with PATTERNS.
+FIRST_BYTES = b"#AFHSTWXflpst"
+
+# One alternation scanned once per file. Each pattern sits in a zero-width
+# lookahead so overlapping hits (an ``Any`` import is also ``Any`` usage) are
+# all reported, as they were when each pattern was applied separately.
+COMBINED: re.Pattern[bytes] = re.compile(
+    b"(?=["
+    + re.escape(FIRST_BYTES)
+    + b"])(?:"
+    + b"|".join(
+        b"(?=(?P<%s>%s))" % (group.encode("ascii"), PATTERNS[name].pattern)
+        for group, (_, name) in _GROUPS.items()
+    )
+    + b")"
+)
+_RULE_NAMES: tuple[str, ...] = tuple(PATTERNS)
+
+# Scan results keyed by path and (mtime_ns, size). The file name carries a
+# digest of this module's source, so any edit to the rules, the test
+# exemptions, the skip list or the scan logic invalidates old results.
+_SCAN_DIGEST = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+CACHE_FILE = ROOT / ".cache" / "guard" / f"pattern_{_SCAN_DIGEST}.json"
+
+CacheEntry = tuple[int, int, list[str]]
+
+# Below this many files to scan, process start-up costs more than it saves.
+PARALLEL_MIN_FILES = 64
+
+
+def _walk(base: Path) -> Iterator[os.DirEntry[str]]:
+    """Yield file entries under ``base``, never descending into excluded dirs."""
+    stack = [str(base)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in EXCLUDE_DIRNAMES:
+                        stack.append(entry.path)
+                elif entry.is_file():
+                    yield entry
+
 
 def iter_files(paths: Iterable[Path]) -> Iterable[Path]:
+    # Do not self-scan guard implementations; they encode patterns.
+    skip = {
+        str(ROOT / "scripts" / "guard.py"),
+        str(ROOT / "scripts" / "guards" / "pattern_guard.py"),
+    }
     for base in paths:
-        if not base.exists():
-            continue
-        for path in base.rglob("*"):
-            if not path.is_file():
-                continue
+        for entry in _walk(base):
+            name = entry.name
             # Disallow .pyi stubs entirely
-            if path.suffix == ".pyi":
-                yield path
+            if name.endswith(".pyi"):
+                yield Path(entry.path)
                 continue
-            if path.suffix not in ALLOW_EXT:
+            if os.path.splitext(name)[1] not in ALLOW_EXT or entry.path in skip:
                 continue
-            if any(part in EXCLUDE_DIRNAMES for part in path.parts):
-                continue
-            # Do not self-scan guard implementations; they encode patterns.
-            if path == ROOT / "scripts" / "guard.py":
-                continue
-            if path == ROOT / "scripts" / "guards" / "pattern_guard.py":
-                continue
-            yield path
+            yield Path(entry.path)
 
 
-def _scan_patterns(path: Path, lines: list[str], *, allow_print: bool) -> list[str]:
-    errors: list[str] = []
-    for name, pattern in PATTERNS.items():
-        if name == "noqa" and allow_print:
+def _scan_patterns(path: Path, data: bytes, *, allow_print: bool) -> list[str]:
+    hits: set[tuple[int, int]] = set()
+    # Matches arrive in offset order, so line numbers are tracked by counting
+    # newlines between consecutive matches; no per-line table is built.
+    line, pos = 1, 0
+    for match in COMBINED.finditer(data):
+        group = match.lastgroup
+        if group is None:  # pragma: no cover - every alternative is a named group
             continue
-        for i, line in enumerate(lines, start=1):
-            if pattern.search(line):
-                errors.append(f"{path}:{i}: disallowed pattern: {name}")
-    return errors
-
-
-def _scan_prints(path: Path, lines: list[str], *, allow_print: bool) -> list[str]:
-    if allow_print:
-        return []
-    errors: list[str] = []
-    for i, line in enumerate(lines, start=1):
-        if re.search(r"(^|\s)print\s*\(", line):
-            errors.append(f"{path}:{i}: disallowed pattern: print() in library code")
-    return errors
+        index, name = _GROUPS[group]
+        if allow_print and name in _ALLOWED_IN_TESTS:
+            continue
+        start = match.start()
+        line += data.count(b"\n", pos, start)
+        pos = start
+        hits.add((index, line))
+    return [f"{path}:{line}: disallowed pattern: {_RULE_NAMES[i]}" for i, line in sorted(hits)]
 
 
 def scan_file(path: Path) -> list[str]:
@@ -88,23 +161,87 @@ def scan_file(path: Path) -> list[str]:
         return [f"{path}: disallowed file: .pyi stubs are not permitted"]
 
     try:
-        text = path.read_text(encoding="utf-8", errors="ignore")
-    except (OSError, UnicodeDecodeError) as exc:  # pragma: no cover
+        with path.open("rb") as f:
+            head = f.read(SNIFF_BYTES)
+            if b"\0" in head:
+                return []
+            data = head + f.read()
+    except OSError as exc:  # pragma: no cover
         raise RuntimeError(f"failed to read {path}: {exc}") from exc
 
     allow_print = "tests" in path.parts
-    lines = text.splitlines()
-    errors: list[str] = []
-    errors.extend(_scan_patterns(path, lines, allow_print=allow_print))
-    errors.extend(_scan_prints(path, lines, allow_print=allow_print))
-    return errors
+    return _scan_patterns(path, data, allow_print=allow_print)
+
+
+def _load_cache(path: Path) -> dict[str, CacheEntry]:
+    cache: dict[str, CacheEntry] = {}
+    try:
+        raw: object = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return cache
+    if not isinstance(raw, dict):
+        return cache
+    entries: dict[str, object] = raw
+    for key, entry in entries.items():
+        if not isinstance(entry, list) or len(entry) != 3:
+            continue
+        fields: list[object] = entry
+        mtime_ns, size, errors = fields
+        if isinstance(mtime_ns, int) and isinstance(size, int) and isinstance(errors, list):
+            items: list[object] = errors
+            cache[key] = (mtime_ns, size, [e for e in items if isinstance(e, str)])
+    return cache
+
+
+def _save_cache(path: Path, cache: dict[str, CacheEntry]) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix="pattern_", suffix=".tmp", dir=str(path.parent))
+        payload: dict[str, list[object]] = {k: [m, s, e] for k, (m, s, e) in cache.items()}
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+        # Results written under an older digest can never be read again.
+        for stale in path.parent.glob("pattern_*.json"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+    except OSError:
+        # The cache is an optimization only; a read-only tree still gets checked.
+        return
+
+
+def _scan_many(paths: list[Path]) -> list[list[str]]:
+    if len(paths) <= PARALLEL_MIN_FILES:
+        return [scan_file(path) for path in paths]
+    with ProcessPoolExecutor() as pool:
+        return list(pool.map(scan_file, paths, chunksize=32))
 
 
 def run(roots: list[str]) -> int:
     base_paths = [ROOT / r for r in roots]
-    violations: list[str] = []
+    cached = _load_cache(CACHE_FILE)
+    fresh: dict[str, CacheEntry] = {}
+    misses: list[Path] = []
     for file_path in iter_files(base_paths):
-        violations.extend(scan_file(file_path))
+        st = file_path.stat()
+        if st.st_size > SIZE_LIMIT and file_path.suffix != ".pyi":
+            print(
+                f"Guard skipped {file_path}: {st.st_size} bytes exceeds {SIZE_LIMIT}",
+                file=sys.stderr,
+            )
+            continue
+        key = str(file_path)
+        hit = cached.get(key)
+        if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            fresh[key] = hit
+        else:
+            fresh[key] = (st.st_mtime_ns, st.st_size, [])
+            misses.append(file_path)
+    for file_path, errors in zip(misses, _scan_many(misses), strict=True):
+        mtime_ns, size, _ = fresh[str(file_path)]
+        fresh[str(file_path)] = (mtime_ns, size, errors)
+    _save_cache(CACHE_FILE, fresh)
+    violations = [error for _, _, errors in fresh.values() for error in errors]
     if violations:
         print("Guard checks failed:")
         for violation in violations:
@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 from collections.abc import Iterator
 from pathlib import Path
-from typing import Final, Protocol, TypedDict
+from typing import BinaryIO, Final, Protocol, TypedDict
 
 import httpx
 
@@ -24,6 +24,33 @@ class RedisLike(Protocol):
     def hgetall(self, name: str) -> dict[str, str]: ...
 
 
+class ResponseLike(Protocol):
+    @property
+    def text(self) -> str: ...
+
+
+class HttpClientLike(Protocol):
+    def post(
+        self,
+        url: str,
+        *,
+        headers: dict[str, str],
+        files: dict[str, tuple[str, BinaryIO, str]],
+    ) -> ResponseLike: ...
+
+
+# Shared across jobs so keep-alive connections (and TLS sessions) are reused
+# instead of paying a fresh handshake per upload.
+_HTTP_CLIENT: Final[httpx.Client] = httpx.Client(
+    timeout=60.0,
+    limits=httpx.Limits(max_keepalive_connections=16, max_connections=64),
+)
+
+
+# Lines are joined and encoded in batches of roughly this size.
+_WRITE_CHUNK_BYTES: Final[int] = 1024 * 1024
+
+
 class JobParams(TypedDict):
     source: str
     language: str
@@ -41,6 +68,23 @@ class LocalCorpusService:
         return iter(())
 
 
+def _encode_chunks(lines: Iterator[str]) -> Iterator[bytes]:
+    """Encode newline-terminated lines, yielding roughly 1 MiB chunks."""
+    pending: list[str] = []
+    size = 0
+    for line in lines:
+        pending.append(line)
+        size += len(line) + 1
+        if size >= _WRITE_CHUNK_BYTES:
+            pending.append("")
+            yield "\n".join(pending).encode("utf-8")
+            pending = []
+            size = 0
+    if pending:
+        pending.append("")
+        yield "\n".join(pending).encode("utf-8")
+
+
 def _results_path(root: Path, job_id: str) -> Path:
     out_dir = root / "results"
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -54,11 +98,13 @@ def process_corpus_impl(
     redis: RedisLike,
     settings: Settings,
     logger: LoggerLike,
+    client: HttpClientLike | None = None,
 ) -> dict[str, str]:
     """Process a corpus and upload the results to the Data Bank API.
 
     The implementation is intentionally minimal and strongly typed to satisfy the
-    integration behavior expected by tests.
+    integration behavior expected by tests. ``client`` defaults to a shared
+    module-level ``httpx.Client``; tests inject a fake.
     """
     root = Path(settings.data_dir)
     logger.info("start job", extra={"job_id": job_id})
@@ -76,16 +122,17 @@ def process_corpus_impl(
     # Stream corpus and write a local results file
     service = LocalCorpusService(settings.data_dir)
     out_path = _results_path(root, job_id)
-    with out_path.open("w", encoding="utf-8") as f:
-        for line in service.stream(params):
-            f.write(f"{line}\n")
+    with out_path.open("wb", buffering=_WRITE_CHUNK_BYTES) as f:
+        for chunk in _encode_chunks(service.stream(params)):
+            f.write(chunk)
 
     # Upload to Data Bank API
     url = f"{settings.data_bank_api_url.rstrip('/')}/files"
     headers = {"X-API-Key": settings.data_bank_api_key}
+    http: HttpClientLike = _HTTP_CLIENT if client is None else client
     with out_path.open("rb") as fh:
-        files = {"file": (f"{job_id}.txt", fh, "text/plain")}
-        resp = httpx.post(url, headers=headers, files=files, timeout=60.0)
+        files: dict[str, tuple[str, BinaryIO, str]] = {"file": (f"{job_id}.txt", fh, "text/plain")}
+        resp = http.post(url, headers=headers, files=files)
 
     try:
         body: dict[str, object] = json.loads(resp.text)
@@ -101,10 +148,12 @@ def process_corpus_impl(
 
 
 __all__ = [
+    "HttpClientLike",
     "JobParams",
     "LocalCorpusService",
     "LoggerLike",
     "RedisLike",
+    "ResponseLike",
     "httpx",
     "process_corpus_impl",
 ]
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 import os
+import re
 import shutil
+import sys
 import tempfile
+import threading
+import time
 from collections.abc import Callable
 from pathlib import Path
-from typing import Annotated, Literal
+from typing import Annotated, Final, Literal, Protocol
 
 from fastapi import FastAPI, File, Request, Response, UploadFile, status
 from fastapi.responses import JSONResponse, StreamingResponse
@@ -21,6 +25,15 @@ from .storage import (
     StoredFileNotFoundError,
 )
 
+# Seconds a /readyz result is reused before the storage probes run again.
+_READY_TTL_S: Final[float] = 1.0
+
+# Single byte-range spec; ASCII digits only so int() never sees other numerals.
+_RANGE_RE: Final[re.Pattern[str]] = re.compile(r"bytes=(\d*)-(\d*)", re.ASCII)
+
+# Shared /healthz body; never mutated, so one instance serves every request.
+_OK: Final[dict[str, str]] = {"status": "ok"}
+
 
 def _is_writable(path: Path) -> bool:
     try:
@@ -33,10 +46,37 @@ def _is_writable(path: Path) -> bool:
         return False
 
 
-def _free_gb(path: Path) -> float:
-    usage = shutil.disk_usage(str(path))
-    free_bytes = usage.free
-    return free_bytes / (1024**3)
+# Platform dispatch is resolved once at import rather than on every /readyz.
+if sys.platform == "win32":  # pragma: no cover - exercised only on Windows
+
+    def _free_gb(path: Path) -> float:
+        usage = shutil.disk_usage(str(path))
+        free_bytes = usage.free
+        return free_bytes / (1024**3)
+
+else:
+
+    def _free_gb(path: Path) -> float:
+        st = os.statvfs(path)
+        return st.f_bavail * st.f_frsize / (1024**3)
+
+
+class HealthProbe(Protocol):
+    """Storage checks behind /readyz; pass one to create_app to replace them."""
+
+    def is_writable(self, path: Path) -> bool: ...
+
+    def free_gb(self, path: Path) -> float: ...
+
+
+class _FsProbe:
+    """Default probe over the local filesystem."""
+
+    def is_writable(self, path: Path) -> bool:
+        return _is_writable(path)
+
+    def free_gb(self, path: Path) -> float:
+        return _free_gb(path)
 
 
 def _request_id(req: Request | None) -> str | None:
@@ -76,7 +116,7 @@ def _ensure_auth(cfg: Settings, perm: Permission, req: Request) -> JSONResponse
 
 def _build_healthz_handler() -> Callable[[], dict[str, str]]:
     def handler() -> dict[str, str]:
-        return {"status": "ok"}
+        return _OK
 
     return handler
 
@@ -109,29 +149,18 @@ def _download_full(
 def _download_range(
     storage: Storage, file_id: str, request: Request, range_header: str
 ) -> StreamingResponse | JSONResponse:
-    if not range_header.startswith("bytes="):
-        rid = _request_id(request)
-        return JSONResponse(
-            status_code=416,
-            content=error_body("INVALID_RANGE", "invalid range", rid),
-        )
-    spec = range_header[len("bytes=") :]
-    if "," in spec:
-        rid = _request_id(request)
-        return JSONResponse(
-            status_code=416,
-            content=error_body("INVALID_RANGE", "multiple ranges not supported", rid),
-        )
-    start_s, _, end_s = spec.partition("-")
-    try:
-        start = int(start_s) if start_s != "" else 0
-        end = int(end_s) if end_s != "" else None
-    except ValueError:
-        rid = _request_id(request)
+    match = _RANGE_RE.fullmatch(range_header)
+    if match is None:
+        multi = range_header.startswith("bytes=") and "," in range_header
+        msg = "multiple ranges not supported" if multi else "invalid range"
         return JSONResponse(
             status_code=416,
-            content=error_body("INVALID_RANGE", "invalid range", rid),
+            content=error_body("INVALID_RANGE", msg, _request_id(request)),
         )
+    start_s: str = match.group(1)
+    end_s: str = match.group(2)
+    start = int(start_s) if start_s != "" else 0
+    end = int(end_s) if end_s != "" else None
     try:
         # Fetch metadata for headers; do not shadow range errors
         meta2 = storage.head(file_id)
@@ -157,11 +186,11 @@ def _download_range(
             headers=headers,
         )
     total = last_pos - start_pos + 1
-    total_size2 = storage.get_size(file_id)
+    # head() already stat'ed the blob; content addressing keeps the size fixed.
     headers = {
         "Accept-Ranges": "bytes",
         "Content-Length": str(total),
-        "Content-Range": f"bytes {start_pos}-{last_pos}/{total_size2}",
+        "Content-Range": f"bytes {start_pos}-{last_pos}/{meta2.size_bytes}",
         "ETag": meta2.sha256,
         "Content-Type": meta2.content_type,
     }
@@ -173,20 +202,38 @@ def _download_range(
     )
 
 
-def _build_readyz_handler(cfg: Settings) -> Callable[[Response], dict[str, str]]:
+def _probe_ready(cfg: Settings, probe: HealthProbe) -> tuple[int, dict[str, str]]:
+    root = Path(cfg.data_root)
+    # is_writable creates a missing root itself, so one probe covers both cases.
+    if not probe.is_writable(root):
+        return status.HTTP_503_SERVICE_UNAVAILABLE, {
+            "status": "degraded",
+            "reason": "storage not writable",
+        }
+    free = probe.free_gb(root)
+    if free < float(cfg.min_free_gb):
+        return status.HTTP_503_SERVICE_UNAVAILABLE, {"status": "degraded", "reason": "low disk"}
+    return status.HTTP_200_OK, {"status": "ready"}
+
+
+def _build_readyz_handler(
+    cfg: Settings, probe: HealthProbe
+) -> Callable[[Response], dict[str, str]]:
+    # Frequent load-balancer probes reuse the last result for a short TTL
+    # instead of repeating the filesystem probes on every request.
+    lock = threading.Lock()
+    cached: tuple[float, int, dict[str, str]] | None = None
+
     def handler(resp: Response) -> dict[str, str]:
-        root = Path(cfg.data_root)
-        if not root.exists() and not _is_writable(root):
-            resp.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
-            return {"status": "degraded", "reason": "storage not writable"}
-        if not _is_writable(root):
-            resp.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
-            return {"status": "degraded", "reason": "storage not writable"}
-        free = _free_gb(root)
-        if free < float(cfg.min_free_gb):
-            resp.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
-            return {"status": "degraded", "reason": "low disk"}
-        return {"status": "ready"}
+        nonlocal cached
+        with lock:
+            now = time.monotonic()
+            if cached is None or now - cached[0] >= _READY_TTL_S:
+                code, body = _probe_ready(cfg, probe)
+                cached = (now, code, body)
+            _, code, body = cached
+        resp.status_code = code
+        return dict(body)
 
     return handler
 
@@ -203,7 +250,7 @@ def _build_upload_handler(
             return auth
         try:
             ct = file.content_type or "application/octet-stream"
-            meta = storage.save_stream(file.file, ct)
+            meta = storage.save_stream(file.file, ct, size_hint=file.size)
             return {
                 "file_id": meta.file_id,
                 "size": meta.size_bytes,
@@ -313,7 +360,7 @@ def _build_delete_handler(storage: Storage, cfg: Settings) -> Callable[[str, Req
     return handler
 
 
-def create_app(settings: Settings | None = None) -> FastAPI:
+def create_app(settings: Settings | None = None, *, probe: HealthProbe | None = None) -> FastAPI:
     cfg = settings or Settings.from_env()
     setup_logging("INFO")
     app = FastAPI(title="data-bank-api", version="0.1.0")
@@ -321,10 +368,17 @@ def create_app(settings: Settings | None = None) -> FastAPI:
         root=Path(cfg.data_root),
         min_free_gb=cfg.min_free_gb,
         max_file_bytes=cfg.max_file_bytes,
+        shard_depth=cfg.shard_depth,
+        shard_width=cfg.shard_width,
     )
 
     app.add_api_route("/healthz", _build_healthz_handler(), methods=["GET"], response_model=None)
-    app.add_api_route("/readyz", _build_readyz_handler(cfg), methods=["GET"], response_model=None)
+    app.add_api_route(
+        "/readyz",
+        _build_readyz_handler(cfg, probe or _FsProbe()),
+        methods=["GET"],
+        response_model=None,
+    )
     app.add_api_route(
         "/files",
         _build_upload_handler(storage, cfg),
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import os
+from collections.abc import Mapping
 from dataclasses import dataclass
+from types import MappingProxyType
 from typing import Final
 
 
@@ -14,32 +16,42 @@ class Settings:
     api_upload_keys: frozenset[str] = frozenset()
     api_read_keys: frozenset[str] = frozenset()
     api_delete_keys: frozenset[str] = frozenset()
+    shard_depth: int = 2
+    shard_width: int = 2
 
     @staticmethod
-    def _get_env_str(name: str, default: str) -> str:
-        v = os.getenv(name)
-        return v if v is not None and v.strip() != "" else default
+    def _get_env_str(raw: str | None, default: str) -> str:
+        return raw if raw is not None and raw.strip() != "" else default
 
     @staticmethod
-    def _csv_env_set(name: str) -> frozenset[str]:
-        raw = os.getenv(name)
-        if raw is None or raw.strip() == "":
+    def _csv_env_set(raw: str | None) -> frozenset[str]:
+        if raw is None:
             return frozenset()
-        parts = [p.strip() for p in raw.split(",") if p.strip() != ""]
-        return frozenset(parts)
+        return frozenset(filter(None, map(str.strip, raw.split(","))))
 
     @classmethod
     def from_env(cls: type[Settings]) -> Settings:
-        root = cls._get_env_str("DATA_ROOT", "/data/files")
-        min_free = cls._get_env_str("MIN_FREE_GB", "1")
-        strict = cls._get_env_str("DELETE_STRICT_404", "false").lower() in {"1", "true", "yes"}
-        max_bytes = cls._get_env_str("MAX_FILE_BYTES", "0")
+        # Settings are immutable, so one parsed instance is reused for as long
+        # as the raw variables it was built from are unchanged.
+        raw = tuple(os.getenv(name) for name in _ENV_VARS)
+        key = (cls, raw)
+        cached = _FROM_ENV_CACHE.get(key)
+        if cached is not None:
+            return cached
+        env = dict(zip(_ENV_VARS, raw, strict=True))
+        root = cls._get_env_str(env["DATA_ROOT"], "/data/files")
+        min_free = cls._get_env_str(env["MIN_FREE_GB"], "1")
+        strict_raw = cls._get_env_str(env["DELETE_STRICT_404"], "false")
+        strict = _BOOL_MAP.get(strict_raw.strip().lower(), False)
+        max_bytes = cls._get_env_str(env["MAX_FILE_BYTES"], "0")
+        shard_depth = cls._get_env_str(env["STORAGE_SHARD_DEPTH"], "2")
+        shard_width = cls._get_env_str(env["STORAGE_SHARD_WIDTH"], "2")
 
-        upload_keys: Final[frozenset[str]] = cls._csv_env_set("API_UPLOAD_KEYS")
-        read_keys: Final[frozenset[str]] = cls._csv_env_set("API_READ_KEYS") or upload_keys
-        delete_keys: Final[frozenset[str]] = cls._csv_env_set("API_DELETE_KEYS") or upload_keys
+        upload_keys: Final[frozenset[str]] = cls._csv_env_set(env["API_UPLOAD_KEYS"])
+        read_keys: Final[frozenset[str]] = cls._csv_env_set(env["API_READ_KEYS"]) or upload_keys
+        delete_keys: Final[frozenset[str]] = cls._csv_env_set(env["API_DELETE_KEYS"]) or upload_keys
 
-        return cls(
+        settings = cls(
             data_root=root,
             min_free_gb=int(min_free),
             delete_strict_404=strict,
@@ -47,4 +59,30 @@ class Settings:
             api_upload_keys=upload_keys,
             api_read_keys=read_keys,
             api_delete_keys=delete_keys,
+            shard_depth=int(shard_depth),
+            shard_width=int(shard_width),
         )
+        _FROM_ENV_CACHE[key] = settings
+        return settings
+
+
+# Every variable from_env reads; their raw values form the cache key.
+_ENV_VARS: Final[tuple[str, ...]] = (
+    "DATA_ROOT",
+    "MIN_FREE_GB",
+    "DELETE_STRICT_404",
+    "MAX_FILE_BYTES",
+    "STORAGE_SHARD_DEPTH",
+    "STORAGE_SHARD_WIDTH",
+    "API_UPLOAD_KEYS",
+    "API_READ_KEYS",
+    "API_DELETE_KEYS",
+)
+# Boolean spellings accepted from the environment; anything else reads as False.
+_BOOL_MAP: Final[Mapping[str, bool]] = MappingProxyType(
+    {
+        **dict.fromkeys(("1", "true", "yes", "y", "on"), True),
+        **dict.fromkeys(("0", "false", "no", "n", "off", ""), False),
+    }
+)
+_FROM_ENV_CACHE: dict[tuple[type[Settings], tuple[str | None, ...]], Settings] = {}
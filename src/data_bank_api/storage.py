@@ -3,13 +3,22 @@ from __future__ import annotations
 import hashlib
 import logging
 import os
+import secrets
 import shutil
+import stat
+import sys
 import tempfile
-from collections.abc import Iterator
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from pathlib import Path
-from typing import BinaryIO
+from typing import BinaryIO, Final, Protocol, runtime_checkable
+
+from typing_extensions import Buffer
 
 
 @dataclass(frozen=True)
@@ -37,30 +46,229 @@ class FileTooLargeError(StorageError):
     pass
 
 
+class _Sha256(Protocol):
+    def update(self, data: Buffer, /) -> None: ...
+
+    def hexdigest(self) -> str: ...
+
+
+def _new_sha256() -> _Sha256:
+    """Return a fresh SHA-256 hasher for content addressing (not for secrets)."""
+    return hashlib.sha256(usedforsecurity=False)
+
+
+# Upper bound on cached FileMetadata entries per Storage instance.
+_META_CACHE_MAX: Final[int] = 4096
+
+# Ranges shorter than this are served from a per-file window kept for
+# _PREFETCH_TTL_S; at most _PREFETCH_MAX windows. A window holds just the
+# requested span until a request starts where the last one ended, and only
+# then reads ahead _PREFETCH_BYTES.
+_PREFETCH_SMALL_SPAN: Final[int] = 64 * 1024
+_PREFETCH_BYTES: Final[int] = 1024 * 1024
+_PREFETCH_TTL_S: Final[float] = 2.0
+_PREFETCH_MAX: Final[int] = 32
+
+# Copy/stream granularity for uploads and range responses.
+_CHUNK_BYTES: Final[int] = 4 * 1024 * 1024
+
+# Uploads up to this size are copied in one read/write, without the staging
+# buffers and writer-thread handoff used for streaming larger bodies.
+_SMALL_UPLOAD_BYTES: Final[int] = 64 * 1024
+
+# One dedicated disk-writer thread shared by every Storage instance; it is
+# started on first use and joined by the interpreter at exit.
+_WRITER: Final[ThreadPoolExecutor] = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="storage-write"
+)
+
+
+class _Reader(Protocol):
+    def read(self, size: int = -1, /) -> bytes: ...
+
+
+@runtime_checkable
+class _ReadIntoReader(Protocol):
+    def readinto(self, buffer: Buffer, /) -> int | None: ...
+
+
+def _read_chunks(stream: _Reader, bufs: Sequence[memoryview]) -> Iterator[memoryview | bytes]:
+    """Yield successive chunks of ``stream``, cycling through ``bufs``.
+
+    Streams with ``readinto`` fill the caller's buffers in place, so the steady
+    state allocates nothing. A yielded view stays valid until its buffer comes
+    round again, i.e. for ``len(bufs) - 1`` further steps.
+    """
+    if isinstance(stream, _ReadIntoReader):
+        i = 0
+        while n := stream.readinto(bufs[i]):
+            yield bufs[i][:n]
+            i = (i + 1) % len(bufs)
+    else:
+        while chunk := stream.read(len(bufs[0])):
+            yield chunk
+
+
+def _read_head(stream: _Reader, limit: int) -> bytes:
+    """Read up to ``limit`` bytes, returning fewer only at EOF.
+
+    A single ``read`` may come back short on raw or custom streams that are
+    not at EOF, so keep reading until the limit is reached or ``b""`` arrives.
+    """
+    head = stream.read(limit)
+    if not head or len(head) >= limit:
+        return head
+    buf = bytearray(head)
+    while len(buf) < limit and (more := stream.read(limit - len(buf))):
+        buf += more
+    return bytes(buf)
+
+
+if sys.platform.startswith("linux"):
+    # Anonymous upload inodes: nothing to clean up if the process dies mid-write.
+    _O_TMPFILE_FLAGS: Final[int] = os.O_TMPFILE | os.O_WRONLY | os.O_CLOEXEC
+    _FADV_SEQUENTIAL: Final[int] = os.POSIX_FADV_SEQUENTIAL
+    _FADV_DONTNEED: Final[int] = os.POSIX_FADV_DONTNEED
+
+    def _fadvise(fd: int, advice: int) -> None:
+        """Best-effort page-cache hint for the whole file; errors are ignored."""
+        try:
+            os.posix_fadvise(fd, 0, 0, advice)
+        except OSError:
+            return
+
+    def _fallocate(fd: int, length: int) -> bool:
+        """Best-effort extent reservation; False when the filesystem declines."""
+        try:
+            os.posix_fallocate(fd, 0, length)
+        except OSError:
+            return False
+        return True
+
+else:  # pragma: no cover - posix_fadvise is Linux-only here
+    _O_TMPFILE_FLAGS = 0
+    _FADV_SEQUENTIAL = 0
+    _FADV_DONTNEED = 0
+
+    def _fadvise(fd: int, advice: int) -> None:
+        return None
+
+    def _fallocate(fd: int, length: int) -> bool:
+        return False
+
+
+_HEX_DIGITS: Final[bytes] = b"0123456789abcdef"
+
+
 def _is_hex(s: str) -> bool:
-    return all(c in "0123456789abcdef" for c in s)
+    # Deleting every hex digit in one C-level pass leaves nothing iff s is hex.
+    return s.isascii() and not s.encode("ascii").translate(None, _HEX_DIGITS)
+
+
+# Seconds a passing free-space check is trusted before statvfs runs again.
+_FREE_SPACE_TTL_S: Final[float] = 1.0
+
+# Sentinel under the storage root recording the directory sharding in use.
+_LAYOUT_FILE: Final[str] = ".layout"
+# Roots created before the sentinel existed always used two levels of two chars.
+_LEGACY_LAYOUT: Final[tuple[int, int]] = (2, 2)
 
 
 class Storage:
-    def __init__(self: Storage, root: Path, min_free_gb: int, *, max_file_bytes: int = 0) -> None:
+    def __init__(
+        self: Storage,
+        root: Path,
+        min_free_gb: int,
+        *,
+        max_file_bytes: int = 0,
+        shard_depth: int = 2,
+        shard_width: int = 2,
+    ) -> None:
         self._root = root
+        # Hot-path blob paths are built as plain strings from this prefix.
+        self._root_str = os.fspath(root)
         self._min_free_bytes = int(min_free_gb) * 1024 * 1024 * 1024
         self._max_file_bytes = int(max_file_bytes) if max_file_bytes is not None else 0
         self._logger = logging.getLogger(__name__)
+        depth, width, persisted = self._load_layout(shard_depth, shard_width)
+        if depth < 1 or width < 1 or depth * width > 64:
+            raise StorageError("invalid storage layout")
+        self._shard_depth = depth
+        self._shard_width = width
+        self._layout_persisted = persisted
+        # Last passing free-space probe and bytes stored since; see _ensure_free_space.
+        # Uploads run on several threads, so all three are guarded by _free_lock.
+        self._free_lock = threading.Lock()
+        self._free_checked_at = float("-inf")
+        self._free_bytes_at_check = 0
+        self._written_since_check = 0
+        # file_id -> (metadata, blob (st_ino, st_mtime_ns, st_size) + sidecar
+        # (st_mtime_ns, st_size)) in LRU order
+        self._meta_cache: OrderedDict[str, tuple[FileMetadata, tuple[int, ...]]] = OrderedDict()
+        self._meta_lock = threading.Lock()
+        self._writer = _WRITER
+        # file_id -> (offset, data, expires_at, stamp) for small adjacent ranges
+        self._range_prefetch: dict[str, tuple[int, bytes, float, tuple[int, int, int]]] = {}
 
-    def _path_for(self: Storage, file_id: str) -> Path:
-        fid = file_id.strip().lower()
-        if len(fid) < 4 or not _is_hex(fid):
-            raise StorageError("invalid file_id")
-        sub1, sub2 = fid[:2], fid[2:4]
-        return self._root / sub1 / sub2 / f"{fid}.bin"
+    def _load_layout(self: Storage, depth: int, width: int) -> tuple[int, int, bool]:
+        """Return (depth, width, persisted) for this root.
 
-    def _meta_path_for(self: Storage, file_id: str) -> Path:
+        An existing sentinel always wins over the requested layout so data is
+        never looked up under the wrong prefix. A root without one that holds
+        a two-character hex shard directory predates the sentinel and is
+        treated as the legacy 2x2 layout; other directories (``lost+found``,
+        strays) do not count. Either override is logged as a warning.
+        """
+        try:
+            text = (self._root / _LAYOUT_FILE).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            if self._root.is_dir() and any(
+                len(p.name) == 2 and _is_hex(p.name) and p.is_dir() for p in self._root.iterdir()
+            ):
+                self._warn_layout_override(depth, width, *_LEGACY_LAYOUT, "legacy shard dirs")
+                return (*_LEGACY_LAYOUT, False)
+            return depth, width, False
+        kv = {k: v for k, _, v in (line.partition("=") for line in text.splitlines())}
+        try:
+            found = int(kv["depth"]), int(kv["width"])
+        except (KeyError, ValueError):
+            raise StorageError("invalid storage layout") from None
+        self._warn_layout_override(depth, width, *found, _LAYOUT_FILE)
+        return (*found, True)
+
+    def _warn_layout_override(
+        self: Storage, depth: int, width: int, used_depth: int, used_width: int, source: str
+    ) -> None:
+        if (depth, width) != (used_depth, used_width):
+            self._logger.warning(
+                "storage layout %dx%d requested but %dx%d in use (from %s)",
+                depth,
+                width,
+                used_depth,
+                used_width,
+                source,
+            )
+
+    def _persist_layout(self: Storage) -> None:
+        layout = f"depth={self._shard_depth}\nwidth={self._shard_width}\n"
+        (self._root / _LAYOUT_FILE).write_text(layout, encoding="utf-8")
+        self._layout_persisted = True
+
+    def _shard_dir(self: Storage, file_id: str) -> tuple[str, str]:
         fid = file_id.strip().lower()
-        if len(fid) < 4 or not _is_hex(fid):
+        width = self._shard_width
+        if len(fid) < self._shard_depth * width or not _is_hex(fid):
             raise StorageError("invalid file_id")
-        sub1, sub2 = fid[:2], fid[2:4]
-        return self._root / sub1 / sub2 / f"{fid}.meta"
+        parts = [fid[i * width : (i + 1) * width] for i in range(self._shard_depth)]
+        return fid, "/".join((self._root_str, *parts))
+
+    def _path_for(self: Storage, file_id: str) -> str:
+        fid, parent = self._shard_dir(file_id)
+        return f"{parent}/{fid}.bin"
+
+    def _meta_path_for(self: Storage, file_id: str) -> str:
+        fid, parent = self._shard_dir(file_id)
+        return f"{parent}/{fid}.meta"
 
     def _read_sidecar(self: Storage, file_id: str) -> tuple[str | None, str | None, str | None]:
         """Read sidecar metadata if present.
@@ -68,85 +276,151 @@ class Storage:
         Returns (sha256, content_type, created_at). Each field can be None if
         missing or invalid.
         """
-        sha: str | None = None
-        ctype: str | None = None
-        created_at: str | None = None
         mpath = self._meta_path_for(file_id)
         try:
-            if mpath.exists():
-                with mpath.open("r", encoding="utf-8", errors="ignore") as mf:
-                    for line in mf:
-                        if line.startswith("sha256="):
-                            v = line[len("sha256=") :].strip()
-                            if _is_hex(v):
-                                sha = v
-                        elif line.startswith("content_type="):
-                            v2 = line[len("content_type=") :].strip()
-                            if v2 != "":
-                                ctype = v2
-                        elif line.startswith("created_at="):
-                            v3 = line[len("created_at=") :].strip()
-                            if v3 != "":
-                                created_at = v3
+            with open(mpath, encoding="utf-8", errors="ignore") as mf:
+                text = mf.read()
         except OSError:
-            pass
+            return None, None, None
+        kv = {k: v.strip() for k, _, v in (line.partition("=") for line in text.splitlines())}
+        sha = kv.get("sha256") or None
+        if sha is not None and not _is_hex(sha):
+            sha = None
+        ctype = kv.get("content_type") or None
+        created_at = kv.get("created_at") or None
         return sha, ctype, created_at
 
+    def _sidecar_stamp(self: Storage, file_id: str) -> tuple[int, int]:
+        """Return the sidecar's (st_mtime_ns, st_size), or (0, -1) if missing."""
+        try:
+            st = os.stat(self._meta_path_for(file_id))
+        except OSError:
+            return 0, -1
+        return st.st_mtime_ns, st.st_size
+
     def _ensure_free_space(self: Storage) -> None:
-        self._root.mkdir(parents=True, exist_ok=True)
-        usage = shutil.disk_usage(self._root)
-        free_bytes = int(usage.free)
-        if free_bytes < self._min_free_bytes:
-            raise InsufficientStorageError("insufficient free space")
+        # Reuse a recent passing probe while the bytes written since then still
+        # leave the estimate above the threshold; otherwise ask the filesystem.
+        with self._free_lock:
+            estimate = self._free_bytes_at_check - self._written_since_check
+            fresh = time.monotonic() - self._free_checked_at < _FREE_SPACE_TTL_S
+            if fresh and estimate >= self._min_free_bytes:
+                return
+            self._root.mkdir(parents=True, exist_ok=True)
+            usage = shutil.disk_usage(self._root)
+            free_bytes = int(usage.free)
+            if free_bytes < self._min_free_bytes:
+                self._free_checked_at = float("-inf")
+                raise InsufficientStorageError("insufficient free space")
+            self._free_checked_at = time.monotonic()
+            self._free_bytes_at_check = free_bytes
+            self._written_since_check = 0
+
+    def _copy_hashed(self: Storage, stream: BinaryIO, f: BinaryIO, h: _Sha256) -> int:
+        """Copy ``stream`` into ``f`` while hashing it; return the byte count.
 
-    def save_stream(self: Storage, stream: BinaryIO, content_type: str) -> FileMetadata:
+        Disk writes run on the shared writer thread while this thread hashes the same
+        chunk (both release the GIL), using two alternating buffers so the
+        next read never lands in a buffer that is still being written. At most
+        one write is in flight, and it is always waited for before returning
+        or raising so the caller can safely close ``f``.
+
+        Bodies of at most ``_SMALL_UPLOAD_BYTES`` skip all of that: one read,
+        one hash update and one write on the calling thread.
+        """
+        head = _read_head(stream, _SMALL_UPLOAD_BYTES + 1)
+        if self._max_file_bytes > 0 and len(head) > self._max_file_bytes:
+            raise FileTooLargeError("file too large")
+        if len(head) <= _SMALL_UPLOAD_BYTES:
+            # _read_head only stops short of the limit at EOF: this is everything.
+            f.write(head)
+            h.update(head)
+            return len(head)
+        bufs = (memoryview(bytearray(_CHUNK_BYTES)), memoryview(bytearray(_CHUNK_BYTES)))
+        size = len(head)
+        pending = self._writer.submit(f.write, head)
+        try:
+            h.update(head)
+            for chunk in _read_chunks(stream, bufs):
+                size += len(chunk)
+                if self._max_file_bytes > 0 and size > self._max_file_bytes:
+                    raise FileTooLargeError("file too large")
+                pending.result()
+                pending = self._writer.submit(f.write, chunk)
+                h.update(chunk)
+            pending.result()
+        finally:
+            wait((pending,))
+        return size
+
+    def _preallocate(self: Storage, fd: int, size_hint: int | None) -> int:
+        """Reserve ``size_hint`` bytes for an upload; return the length reserved.
+
+        Nothing is reserved without a positive hint or when the hint already
+        exceeds the size limit (the copy loop rejects such uploads anyway).
+        """
+        if size_hint is None or size_hint <= 0:
+            return 0
+        if self._max_file_bytes > 0 and size_hint > self._max_file_bytes:
+            return 0
+        return size_hint if _fallocate(fd, size_hint) else 0
+
+    def save_stream(
+        self: Storage, stream: BinaryIO, content_type: str, *, size_hint: int | None = None
+    ) -> FileMetadata:
         """Save stream to storage using server-generated sha256 file_id.
 
         Writes to a temp file in the storage root, computes sha256 and total size,
-        enforces max size if configured, then atomically renames to the final
-        hierarchical path. Also writes a small sidecar metadata file containing
-        content_type and created_at for faster HEAD/INFO.
+        enforces max size if configured, then atomically publishes it at the final
+        hierarchical path, replacing any earlier copy so every upload is a new
+        blob version. Also writes a small, non-durable sidecar metadata file
+        containing content_type and created_at for faster HEAD/INFO.
+
+        ``size_hint`` is the expected length when the caller knows it; the temp
+        file is preallocated to that size so the blob lands in few extents.
         """
         self._ensure_free_space()
         self._root.mkdir(parents=True, exist_ok=True)
-        fd, tmp = tempfile.mkstemp(prefix="upload_", dir=str(self._root))
-        size = 0
-        h = hashlib.sha256()
+        if not self._layout_persisted:
+            self._persist_layout()
+        fd, tmp = self._open_upload_tmp()
+        h = _new_sha256()
         try:
             with os.fdopen(fd, "wb") as f:
-                while True:
-                    chunk = stream.read(1024 * 1024)
-                    if not chunk:
-                        break
-                    f.write(chunk)
-                    size += len(chunk)
-                    if self._max_file_bytes > 0 and size > self._max_file_bytes:
-                        raise FileTooLargeError("file too large")
-                    h.update(chunk)
+                _fadvise(f.fileno(), _FADV_SEQUENTIAL)
+                reserved = self._preallocate(f.fileno(), size_hint)
+                size = self._copy_hashed(stream, f, h)
                 f.flush()
+                if size < reserved:
+                    # The stream came up short of the hint; drop the tail.
+                    os.ftruncate(f.fileno(), size)
                 os.fsync(f.fileno())
-            file_id = h.hexdigest()
-            target = self._path_for(file_id)
-            target_parent = target.parent
-            target_parent.mkdir(parents=True, exist_ok=True)
-            os.replace(tmp, target)
+                # Pages are clean after fsync; drop them rather than let upload
+                # data evict hotter cache entries.
+                _fadvise(f.fileno(), _FADV_DONTNEED)
+                file_id = h.hexdigest()
+                _, target_parent = self._shard_dir(file_id)
+                os.makedirs(target_parent, exist_ok=True)
+                target = self._path_for(file_id)
+                if tmp is None:
+                    self._link_tmpfile(f.fileno(), target_parent, f"{file_id}.bin")
+            if tmp is not None:
+                os.replace(tmp, target)
+                tmp = None  # published; nothing left to clean up
+            with self._free_lock:
+                self._written_since_check += size
             created_at = datetime.now(tz=UTC).isoformat()
-            # Write sidecar metadata atomically under the final directory
-            meta_tmp_fd, meta_tmp = tempfile.mkstemp(prefix="meta_", dir=str(target_parent))
-            try:
-                with os.fdopen(meta_tmp_fd, "w", encoding="utf-8") as mf:
-                    mf.write(f"sha256={file_id}\n")
-                    mf.write(f"content_type={content_type}\n")
-                    mf.write(f"created_at={created_at}\n")
-                    mf.flush()
-                    os.fsync(mf.fileno())
-                os.replace(meta_tmp, self._meta_path_for(file_id))
-            finally:
-                try:
-                    if os.path.exists(meta_tmp):
-                        os.unlink(meta_tmp)
-                except OSError:
-                    pass
+            # The sidecar is advisory (head() tolerates a missing or torn one),
+            # so it is written in place without a temp file or fsync.
+            with open(self._meta_path_for(file_id), "wb") as mf:
+                mf.write(
+                    f"sha256={file_id}\ncontent_type={content_type}\n"
+                    f"created_at={created_at}\n".encode()
+                )
+            # Only after the sidecar is complete, so a head() racing the write
+            # cannot leave its fallback metadata behind.
+            with self._meta_lock:
+                self._meta_cache.pop(file_id, None)
             return FileMetadata(
                 file_id=file_id,
                 size_bytes=size,
@@ -155,54 +429,130 @@ class Storage:
                 created_at=created_at,
             )
         finally:
-            try:
-                if os.path.exists(tmp):
+            if tmp is not None:
+                try:
                     os.unlink(tmp)
+                except OSError:
+                    self._logger.debug("could not remove upload temp file %s", tmp)
+
+    def _link_tmpfile(self: Storage, fd: int, parent: str, name: str) -> None:
+        """Publish an O_TMPFILE inode as parent/name, replacing any existing blob.
+
+        linkat() must follow the /proc/self/fd magic link (AT_SYMLINK_FOLLOW),
+        which os.link only requests when a dir fd is passed. linkat() cannot
+        overwrite, so a re-upload is linked under a staging name and renamed
+        over the old blob; the new inode is what tells metadata caches in
+        other instances that the blob changed.
+        """
+        src = f"/proc/self/fd/{fd}"
+        dir_fd = os.open(parent, os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+        try:
+            try:
+                os.link(src, name, dst_dir_fd=dir_fd, follow_symlinks=True)
+                return
+            except FileExistsError:
+                self._logger.debug("blob %s already stored; replacing it", name)
+            staged = f".{name}.{secrets.token_hex(8)}"
+            os.link(src, staged, dst_dir_fd=dir_fd, follow_symlinks=True)
+            try:
+                os.replace(staged, name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+            except OSError:
+                os.unlink(staged, dir_fd=dir_fd)
+                raise
+        finally:
+            os.close(dir_fd)
+
+    def _open_upload_tmp(self: Storage) -> tuple[int, str | None]:
+        """Open a temp file for an upload under the storage root.
+
+        Returns (fd, name). On Linux this is an unnamed O_TMPFILE inode
+        (name None) published later with a single link; filesystems without
+        O_TMPFILE support fall back to a named mkstemp file.
+        """
+        if _O_TMPFILE_FLAGS:
+            try:
+                return os.open(self._root_str, _O_TMPFILE_FLAGS, 0o600), None
             except OSError:
-                pass
+                self._logger.debug("O_TMPFILE unavailable; using mkstemp")
+        fd, tmp = tempfile.mkstemp(prefix="upload_", dir=self._root_str)
+        return fd, tmp
+
+    @staticmethod
+    def _stat_or_404(path: str, file_id: str) -> os.stat_result:
+        """Stat a blob once, mapping missing or non-regular files to not-found."""
+        try:
+            st = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            raise StoredFileNotFoundError(file_id) from None
+        if not stat.S_ISREG(st.st_mode):
+            raise StoredFileNotFoundError(file_id)
+        return st
 
     def head(self: Storage, file_id: str) -> FileMetadata:
         path = self._path_for(file_id)
-        if not path.exists() or not path.is_file():
-            raise StoredFileNotFoundError(file_id)
-        size = path.stat().st_size
-        # Try sidecar metadata for sha256/content_type/created_at; fall back safely
+        st = self._stat_or_404(path, file_id)
+        size = st.st_size
+        fid = file_id.strip().lower()
+        # A blob is replaced, never rewritten, so inode/mtime/size identify it;
+        # the sidecar is rewritten in place, so its mtime/size are stamped too.
+        stamp = (st.st_ino, st.st_mtime_ns, size, *self._sidecar_stamp(file_id))
+        with self._meta_lock:
+            hit = self._meta_cache.get(fid)
+            if hit is not None and hit[1] == stamp:
+                self._meta_cache.move_to_end(fid)
+                return hit[0]
+        # Try sidecar metadata for content_type/created_at; fall back safely
         sha, ctype, created_at = self._read_sidecar(file_id)
-        if sha is None:
-            h = hashlib.sha256()
-            with path.open("rb") as f:
-                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+        if len(fid) == 64:
+            # Server-generated ids are the content sha256; no need to rehash.
+            sha = fid
+        elif sha is None:
+            with open(path, "rb") as f:
+                _fadvise(f.fileno(), _FADV_SEQUENTIAL)
+                h = _new_sha256()
+                for chunk in _read_chunks(f, (memoryview(bytearray(_CHUNK_BYTES)),)):
                     h.update(chunk)
-            sha = h.hexdigest()
+                sha = h.hexdigest()
         if ctype is None:
             ctype = "application/octet-stream"
-        return FileMetadata(
-            file_id=file_id.strip().lower(),
+        meta = FileMetadata(
+            file_id=fid,
             size_bytes=size,
             sha256=sha,
             content_type=ctype,
             created_at=created_at,
         )
+        with self._meta_lock:
+            self._meta_cache[fid] = (meta, stamp)
+            self._meta_cache.move_to_end(fid)
+            if len(self._meta_cache) > _META_CACHE_MAX:
+                self._meta_cache.popitem(last=False)
+        return meta
 
     def open_range(
         self: Storage, file_id: str, start: int, end_inclusive: int | None
     ) -> tuple[Iterator[bytes], int, int]:
         path = self._path_for(file_id)
-        if not path.exists() or not path.is_file():
-            raise StoredFileNotFoundError(file_id)
-        size = path.stat().st_size
+        st = self._stat_or_404(path, file_id)
+        size = st.st_size
         if start < 0 or (end_inclusive is not None and end_inclusive < start):
             raise StorageError("invalid range")
         last = size - 1 if end_inclusive is None or end_inclusive > size - 1 else end_inclusive
         if start > last:
             raise StorageError("unsatisfiable range")
+        if last - start < _PREFETCH_SMALL_SPAN:
+            stamp = (st.st_ino, st.st_mtime_ns, size)
+            data = self._read_small_range(path, file_id, stamp, start, last)
+            return iter((data,)), start, last
 
         def _iter() -> Iterator[bytes]:
-            with path.open("rb") as f:
+            with open(path, "rb") as f:
                 f.seek(start)
                 to_read = last - start + 1
+                if to_read > _CHUNK_BYTES:
+                    _fadvise(f.fileno(), _FADV_SEQUENTIAL)
                 while to_read > 0:
-                    chunk = f.read(min(1024 * 1024, to_read))
+                    chunk = f.read(min(_CHUNK_BYTES, to_read))
                     if not chunk:  # pragma: no cover - defensive
                         break
                     yield chunk
@@ -210,25 +560,68 @@ class Storage:
 
         return _iter(), start, last
 
+    def _read_small_range(
+        self: Storage,
+        path: str,
+        file_id: str,
+        stamp: tuple[int, int, int],
+        start: int,
+        last: int,
+    ) -> bytes:
+        """Serve a short range from a read-ahead window, reading one if needed.
+
+        Clients that walk a file in small adjacent ranges then hit memory
+        instead of issuing one open/seek/read per request. Random probes
+        (footers, sparse seeks) read only what they ask for.
+        """
+        fid = file_id.strip().lower()
+        now = time.monotonic()
+        span = last - start + 1
+        read_size = span
+        with self._meta_lock:
+            hit = self._range_prefetch.get(fid)
+        if hit is not None:
+            offset, window, expires_at, hit_stamp = hit
+            if hit_stamp == stamp and now < expires_at:
+                if offset <= start and last < offset + len(window):
+                    return window[start - offset : last - offset + 1]
+                if start == offset + len(window):
+                    # Continues where the previous window ended: read ahead.
+                    read_size = max(span, _PREFETCH_BYTES)
+        try:
+            with open(path, "rb") as f:
+                f.seek(start)
+                window = f.read(read_size)
+        except FileNotFoundError:
+            raise StoredFileNotFoundError(file_id) from None
+        with self._meta_lock:
+            self._range_prefetch.pop(fid, None)
+            self._range_prefetch[fid] = (start, window, now + _PREFETCH_TTL_S, stamp)
+            if len(self._range_prefetch) > _PREFETCH_MAX:
+                del self._range_prefetch[next(iter(self._range_prefetch))]
+        return window[:span]
+
     def delete(self: Storage, file_id: str) -> bool:
         path = self._path_for(file_id)
         meta_path = self._meta_path_for(file_id)
+        with self._meta_lock:
+            self._meta_cache.pop(file_id.strip().lower(), None)
+            self._range_prefetch.pop(file_id.strip().lower(), None)
         existed = False
         try:
-            path.unlink()
+            os.unlink(path)
             existed = True
         except FileNotFoundError:
             # Blob already missing; proceed to sidecar cleanup below.
             pass
 
-        if meta_path.exists():
-            meta_path.unlink()
+        try:
+            os.unlink(meta_path)
             existed = True
+        except FileNotFoundError:
+            pass
 
         return existed
 
     def get_size(self: Storage, file_id: str) -> int:
-        path = self._path_for(file_id)
-        if not path.exists() or not path.is_file():
-            raise StoredFileNotFoundError(file_id)
-        return int(path.stat().st_size)
+        return int(self._stat_or_404(self._path_for(file_id), file_id).st_size)
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from data_bank_api.app import create_app
+from data_bank_api.config import Settings
+
+
+@pytest.fixture()
+def client(tmp_path: Path) -> TestClient:
+    """App client over a per-test data root with the free-space check disabled."""
+    s = Settings(data_root=str(tmp_path / "files"), min_free_gb=0)
+    return TestClient(create_app(s))
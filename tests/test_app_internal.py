@@ -1,12 +1,13 @@
 from __future__ import annotations
 
+import shutil
 import tempfile
 from pathlib import Path
 from typing import Never
 
 from _pytest.monkeypatch import MonkeyPatch
 
-from data_bank_api.app import _is_writable, _request_id
+from data_bank_api.app import _free_gb, _is_writable, _request_id
 
 
 def test__is_writable_handles_oserror(monkeypatch: MonkeyPatch) -> None:
@@ -20,3 +21,8 @@ def test__is_writable_handles_oserror(monkeypatch: MonkeyPatch) -> None:
 
 def test__request_id_handles_none() -> None:
     assert _request_id(None) is None
+
+
+def test__free_gb_matches_disk_usage(tmp_path: Path) -> None:
+    expected = shutil.disk_usage(str(tmp_path)).free / (1024**3)
+    assert abs(_free_gb(tmp_path) - expected) < 0.5
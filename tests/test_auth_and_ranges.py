@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import io
 import json
 from pathlib import Path
 
@@ -28,7 +27,7 @@ def test_auth_enforced_upload_401_403_200(tmp_path: Path) -> None:
     # Missing key -> 401
     r1 = client.post(
         "/files",
-        files={"file": ("abcd1234", io.BytesIO(b"hi"), "text/plain")},
+        files={"file": ("abcd1234", b"hi", "text/plain")},
     )
     assert r1.status_code == 401
     b1: dict[str, object] = json.loads(r1.text)
@@ -37,7 +36,7 @@ def test_auth_enforced_upload_401_403_200(tmp_path: Path) -> None:
     # Wrong key -> 403
     r2 = client.post(
         "/files",
-        files={"file": ("abcd1234", io.BytesIO(b"hi"), "text/plain")},
+        files={"file": ("abcd1234", b"hi", "text/plain")},
         headers={"X-API-Key": "wrong"},
     )
     assert r2.status_code == 403
@@ -45,7 +44,7 @@ def test_auth_enforced_upload_401_403_200(tmp_path: Path) -> None:
     # Correct key -> 201
     r3 = client.post(
         "/files",
-        files={"file": ("abcd1234", io.BytesIO(b"hi"), "text/plain")},
+        files={"file": ("abcd1234", b"hi", "text/plain")},
         headers={"X-API-Key": "k1"},
     )
     assert r3.status_code == 201
@@ -69,7 +68,7 @@ def test_range_errors_and_headers(tmp_path: Path) -> None:
     payload = b"hello world" * 3
     r0 = client.post(
         "/files",
-        files={"file": ("anyname.txt", io.BytesIO(payload), "application/octet-stream")},
+        files={"file": ("anyname.txt", payload, "application/octet-stream")},
     )
     assert r0.status_code in (200, 201)
     body0: dict[str, object] = json.loads(r0.text)
@@ -85,11 +84,18 @@ def test_range_errors_and_headers(tmp_path: Path) -> None:
     # multiple ranges
     r2 = client.get(f"/files/{fid}", headers={"Range": "bytes=0-1,2-3"})
     assert r2.status_code == 416
+    j2: dict[str, object] = json.loads(r2.text)
+    assert j2["message"] == "multiple ranges not supported"
 
     # non-numeric
     r3 = client.get(f"/files/{fid}", headers={"Range": "bytes=abc-"})
     assert r3.status_code == 416
 
+    # missing dash, padded or signed numbers
+    for bad in ("bytes=5", "bytes= 5-", "bytes=+5-"):
+        rb = client.get(f"/files/{fid}", headers={"Range": bad})
+        assert rb.status_code == 416
+
     # unsatisfiable
     r4 = client.get(f"/files/{fid}", headers={"Range": "bytes=999999-"})
     assert r4.status_code == 416
@@ -115,7 +121,7 @@ def test_upload_507_from_guard(tmp_path: Path, monkeypatch: pytest.MonkeyPatch)
     monkeypatch.setattr(Storage, "_ensure_free_space", _boom)
     r = client.post(
         "/files",
-        files={"file": ("abcd1234", io.BytesIO(b"data"), "text/plain")},
+        files={"file": ("abcd1234", b"data", "text/plain")},
     )
     assert r.status_code == 507
 
@@ -131,7 +137,7 @@ def test_upload_413_payload_too_large(tmp_path: Path) -> None:
     client = _client(tmp_path, s)
     resp = client.post(
         "/files",
-        files={"file": ("x.txt", io.BytesIO(b"dd"), "text/plain")},
+        files={"file": ("x.txt", b"dd", "text/plain")},
     )
     assert resp.status_code == 413
 
@@ -165,7 +171,7 @@ def test_unsatisfiable_range_with_disappearing_file(
     # create a small file
     _ = client.post(
         "/files",
-        files={"file": (fid, io.BytesIO(b"hello"), "application/octet-stream")},
+        files={"file": (fid, b"hello", "application/octet-stream")},
     )
 
     # Simulate file disappearing when computing size after unsatisfiable detection
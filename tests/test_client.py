@@ -2,8 +2,10 @@ from __future__ import annotations
 
 import io
 import json
-import os
-from hashlib import sha256
+import random
+import re
+from collections.abc import Callable
+from hashlib import file_digest, sha256
 from pathlib import Path
 
 import httpx
@@ -20,30 +22,97 @@ from data_bank_api.client import (
     RangeNotSatisfiableError,
 )
 
+# filename="<fid>" followed by the rest of the part headers up to the blank line
+_PART_HEAD_RE = re.compile(rb'filename="([^"]*)"(.*?)\r\n\r\n', re.S)
+_PART_CTYPE_RE = re.compile(rb"\r\nContent-Type:([^\r]*)", re.I)
+# /files, /files/<fid> or /files/<fid>/info
+_ROUTE_RE = re.compile(r"/files(?:/(?P<fid>[^/]+)(?P<info>/info)?)?")
+
+
+# Payloads are immutable, so each distinct one is hashed once per module.
+# A plain dict rather than functools.cache, which mypy cannot type strictly here.
+_HEX_CACHE: dict[bytes, str] = {}
+
+
+def _hex(data: bytes) -> str:
+    digest = _HEX_CACHE.get(data)
+    if digest is None:
+        digest = _HEX_CACHE[data] = sha256(data).hexdigest()
+    return digest
+
+
+def _assert_file_eq(path: Path, expected: bytes) -> None:
+    # Size first, then a streamed digest against the memoized one; the file is
+    # never loaded whole into a Python bytes object.
+    assert path.stat().st_size == len(expected)
+    with open(path, "rb", buffering=0) as f:
+        assert file_digest(f, "sha256").hexdigest() == _hex(expected)
+
+
+# Shared payloads, built once per module rather than per test
+_P_HELLO5K = b"hello" * 1000
+_P_X10 = b"x" * 10
+_P_Z100 = b"z" * 100
+_P_M64 = b"m" * 64
+_P_ABC30 = b"abc" * 10
+_P_Z1K = b"z" * 1024
+_P_Q256 = b"q" * 256
+
+
+def _header(request: httpx.Request, name: str) -> str | None:
+    # httpx.Headers is case-insensitive; get_list() is precisely typed, .get() is not.
+    values = request.headers.get_list(name)
+    return values[0] if values else None
+
+
+def _err_json(code: str, message: str) -> bytes:
+    body: dict[str, str | None] = {"code": code, "message": message, "request_id": None}
+    return json.dumps(body).encode()
+
+
+# Fixed error bodies, serialized once at import: key -> (status, body)
+_ERRS: dict[str, tuple[int, bytes]] = {
+    "unauth": (401, _err_json("UNAUTHORIZED", "missing/invalid")),
+    "not_found": (404, _err_json("NOT_FOUND", "not found")),
+    "bad400": (400, _err_json("BAD_REQUEST", "bad")),
+    "bad403": (403, _err_json("FORBIDDEN", "no")),
+    "bad507": (507, _err_json("INSUFFICIENT_STORAGE", "low")),
+    "err502": (502, _err_json("ERROR", "bad gateway")),
+    "err416": (416, _err_json("RANGE_NOT_SATISFIABLE", "bad")),
+    "retry": (500, _err_json("E", "retry")),
+    "missing_rid": (500, _err_json("E", "missing rid")),
+    "invalid_range": (416, _err_json("INVALID_RANGE", "invalid range")),
+    "unsat": (416, _err_json("RANGE_NOT_SATISFIABLE", "unsat")),
+    "unhandled": (500, _err_json("ERROR", "unhandled")),
+}
+
+
+def _err(key: str, headers: dict[str, str] | None = None) -> httpx.Response:
+    # A fresh Response per call: the transport binds each one to its request
+    status, body = _ERRS[key]
+    return httpx.Response(status, content=body, headers=headers)
+
 
 class _MemStore:
     def __init__(self) -> None:
-        self._files: dict[str, bytes] = {}
-        self._ctype: dict[str, str] = {}
+        # fid -> (data, content_type, sha256 hex); the digest is computed once at put()
+        self._meta: dict[str, tuple[bytes, str, str]] = {}
 
     def put(self, fid: str, data: bytes, ctype: str) -> None:
-        self._files[fid] = data
-        self._ctype[fid] = ctype
+        self._meta[fid] = (data, ctype, _hex(data))
+
+    def get_meta(self, fid: str) -> tuple[bytes, str, str]:
+        return self._meta[fid]
 
     def get(self, fid: str) -> tuple[bytes, str]:
-        if fid not in self._files:
-            raise KeyError(fid)
-        return self._files[fid], self._ctype.get(fid, "application/octet-stream")
+        data, ctype, _ = self._meta[fid]
+        return data, ctype
 
     def delete(self, fid: str) -> bool:
-        if fid in self._files:
-            del self._files[fid]
-            self._ctype.pop(fid, None)
-            return True
-        return False
+        return self._meta.pop(fid, None) is not None
 
     def exists(self, fid: str) -> bool:
-        return fid in self._files
+        return fid in self._meta
 
 
 class _MockServer:
@@ -51,79 +120,61 @@ class _MockServer:
         self._store = store
         self._key = expect_key
         self._counts: dict[str, int] = {}
-
-    @staticmethod
-    def _unauth() -> httpx.Response:
-        body = {"code": "UNAUTHORIZED", "message": "missing/invalid", "request_id": None}
-        return httpx.Response(401, text=json.dumps(body))
-
-    @staticmethod
-    def _not_found() -> httpx.Response:
-        body = {"code": "NOT_FOUND", "message": "not found", "request_id": None}
-        return httpx.Response(404, text=json.dumps(body))
+        # (method, route kind) -> handler; kind comes from _ROUTE_RE
+        self._routes: dict[tuple[str, str], Callable[[httpx.Request, str], httpx.Response]] = {
+            ("POST", "root"): self._route_post,
+            ("HEAD", "fid"): self._route_head,
+            ("GET", "info"): self._route_info,
+            ("GET", "fid"): self._route_get,
+            ("DELETE", "fid"): self._route_delete,
+        }
 
     def _post_files(self, request: httpx.Request) -> httpx.Response:
         content = request.content
-        hdrs = {k.lower(): v for (k, v) in request.headers.items()}
-        ct_header = hdrs.get("content-type", "")
+        ct_header = _header(request, "content-type") or ""
         # extract boundary token
         b_key = "boundary="
         bpos = ct_header.find(b_key)
         assert bpos != -1
         boundary = ct_header[bpos + len(b_key) :]
         boundary = boundary.strip('"')
-        bbytes = ("--" + boundary).encode("latin-1")
-        # find filename for fid
-        txt = content.decode("latin-1", errors="ignore")
-        idx = txt.find("filename=")
-        assert idx != -1
-        q1 = txt.find('"', idx)
-        q2 = txt.find('"', q1 + 1)
-        fid = txt[q1 + 1 : q2]
-        # find payload start/end using boundary markers
-        # locate the first boundary line, then the end of part headers
-        bpos0 = content.find(bbytes)
-        assert bpos0 != -1
-        start = content.find(b"\r\n\r\n", bpos0)
-        assert start != -1
-        start += 4
-        end = content.find(b"\r\n" + bbytes, start)
+        # one pass locates the file name and the end of the part headers
+        m = _PART_HEAD_RE.search(content)
+        assert m is not None
+        fid_b: bytes = m.group(1)
+        part_hdrs: bytes = m.group(2)
+        fid = fid_b.decode("latin-1")
+        start = m.end()
+        end = content.find(b"\r\n--" + boundary.encode("latin-1"), start)
         assert end != -1
         data = content[start:end]
-        # derive ctype from part headers
-        ctype_line_start = txt.find("Content-Type:", q2)
+        # derive ctype from the remaining part headers
         ctype = "application/octet-stream"
-        if ctype_line_start != -1:
-            ctype_line_end = txt.find("\r\n", ctype_line_start)
-            ctype = txt[ctype_line_start:ctype_line_end].split(":", 1)[1].strip()
+        ct = _PART_CTYPE_RE.search(part_hdrs)
+        if ct is not None:
+            ct_b: bytes = ct.group(1)
+            ctype = ct_b.decode("latin-1").strip()
         if len(data) > 0 or not self._store.exists(fid):
             self._store.put(fid, data, ctype)
+            digest = self._store.get_meta(fid)[2]
+        else:
+            digest = _hex(data)
         body = {
             "file_id": fid,
             "size": len(data),
-            "sha256": sha256(data).hexdigest(),
+            "sha256": digest,
             "content_type": ctype,
             "created_at": None,
         }
-        return httpx.Response(201, text=json.dumps(body))
+        return httpx.Response(201, json=body)
 
     def _head_file(self, fid: str) -> httpx.Response:
         # special error ids
-        if fid == "bad400":
-            body = {"code": "BAD_REQUEST", "message": "bad", "request_id": None}
-            return httpx.Response(400, text=json.dumps(body))
-        if fid == "bad403":
-            body = {"code": "FORBIDDEN", "message": "no", "request_id": None}
-            return httpx.Response(403, text=json.dumps(body))
-        if fid == "bad507":
-            body = {"code": "INSUFFICIENT_STORAGE", "message": "low", "request_id": None}
-            return httpx.Response(507, text=json.dumps(body))
-        if fid == "err502":
-            body = {"code": "ERROR", "message": "bad gateway", "request_id": None}
-            return httpx.Response(502, text=json.dumps(body))
+        if fid in ("bad400", "bad403", "bad507", "err502"):
+            return _err(fid)
         if fid == "checkrid":
             # Ensure request-id header is surfaced; require it
-            # header set in handle via hdrs dict
+            # header checked in _route_head
             headers = {
                 "Content-Length": "0",
                 "ETag": "",
@@ -134,57 +185,50 @@ class _MockServer:
             c = self._counts.get(fid, 0) + 1
             self._counts[fid] = c
             if c <= 2:
-                body = {"code": "E", "message": "retry", "request_id": None}
-                return httpx.Response(500, text=json.dumps(body))
+                return _err("retry")
         try:
-            data, ctype = self._store.get(fid)
+            data, ctype, digest = self._store.get_meta(fid)
         except KeyError:
-            return self._not_found()
+            return _err("not_found")
         headers = {
             "Content-Length": str(len(data)),
-            "ETag": sha256(data).hexdigest(),
+            "ETag": digest,
             "Content-Type": ctype,
         }
         return httpx.Response(200, headers=headers)
 
     def _get_info(self, fid: str) -> httpx.Response:
         try:
-            data, ctype = self._store.get(fid)
+            data, ctype, digest = self._store.get_meta(fid)
         except KeyError:
-            return self._not_found()
+            return _err("not_found")
         body = {
             "file_id": fid,
             "size": len(data),
-            "sha256": sha256(data).hexdigest(),
+            "sha256": digest,
             "content_type": ctype,
         }
-        return httpx.Response(200, text=json.dumps(body))
+        return httpx.Response(200, json=body)
 
     def _get_file(self, fid: str, rng: str | None) -> httpx.Response:
         if fid == "err416":
-            body = {"code": "RANGE_NOT_SATISFIABLE", "message": "bad", "request_id": None}
-            headers = {"Content-Range": "bytes */10"}
-            return httpx.Response(416, text=json.dumps(body), headers=headers)
+            return _err("err416", {"Content-Range": "bytes */10"})
         try:
             data, ctype = self._store.get(fid)
         except KeyError:
-            return self._not_found()
+            return _err("not_found")
         if rng is None:
             headers = {"Content-Length": str(len(data)), "Content-Type": ctype}
             return httpx.Response(200, content=data, headers=headers)
         if not rng.startswith("bytes="):
-            body = {"code": "INVALID_RANGE", "message": "invalid range", "request_id": None}
-            return httpx.Response(416, text=json.dumps(body))
+            return _err("invalid_range")
         start_s = rng[len("bytes=") :].split("-")[0]
         try:
             start = int(start_s) if start_s != "" else 0
         except ValueError:
-            body = {"code": "INVALID_RANGE", "message": "invalid range", "request_id": None}
-            return httpx.Response(416, text=json.dumps(body))
+            return _err("invalid_range")
         if start >= len(data):
-            headers = {"Content-Range": f"bytes */{len(data)}"}
-            body = {"code": "RANGE_NOT_SATISFIABLE", "message": "unsat", "request_id": None}
-            return httpx.Response(416, text=json.dumps(body), headers=headers)
+            return _err("unsat", {"Content-Range": f"bytes */{len(data)}"})
         part = data[start:]
         headers = {
             "Content-Length": str(len(part)),
@@ -194,33 +238,42 @@ class _MockServer:
 
     def _delete(self, fid: str) -> httpx.Response:
         if not self._store.delete(fid):
-            return self._not_found()
+            return _err("not_found")
         return httpx.Response(204)
 
+    def _route_post(self, request: httpx.Request, _: str) -> httpx.Response:
+        return self._post_files(request)
+
+    def _route_head(self, request: httpx.Request, fid: str) -> httpx.Response:
+        # require request id for checkrid
+        if fid == "checkrid" and "x-request-id" not in request.headers:
+            return _err("missing_rid")
+        return self._head_file(fid)
+
+    def _route_info(self, _: httpx.Request, fid: str) -> httpx.Response:
+        return self._get_info(fid)
+
+    def _route_get(self, request: httpx.Request, fid: str) -> httpx.Response:
+        return self._get_file(fid, _header(request, "range"))
+
+    def _route_delete(self, _: httpx.Request, fid: str) -> httpx.Response:
+        return self._delete(fid)
+
     def handle(self, request: httpx.Request) -> httpx.Response:
-        hdrs: dict[str, str] = {k.lower(): v for (k, v) in request.headers.items()}
-        hdr = hdrs.get("x-api-key")
-        if hdr != self._key:
-            return self._unauth()
-        path = request.url.path
-        if path == "/files" and request.method == "POST":
-            return self._post_files(request)
-        if request.method == "HEAD" and path.startswith("/files/"):
-            fid = path.split("/")[-1]
-            # require request id for checkrid
-            if fid == "checkrid" and "x-request-id" not in hdrs:
-                body = {"code": "E", "message": "missing rid", "request_id": None}
-                return httpx.Response(500, text=json.dumps(body))
-            return self._head_file(fid)
-        if request.method == "GET" and path.endswith("/info"):
-            return self._get_info(path.split("/")[-2])
-        if request.method == "GET" and path.startswith("/files/"):
-            rng_s = hdrs.get("range")
-            return self._get_file(path.split("/")[-1], rng_s)
-        if request.method == "DELETE" and path.startswith("/files/"):
-            return self._delete(path.split("/")[-1])
-        body = {"code": "ERROR", "message": "unhandled", "request_id": None}
-        return httpx.Response(500, text=json.dumps(body))
+        if _header(request, "x-api-key") != self._key:
+            return _err("unauth")
+        m = _ROUTE_RE.fullmatch(request.url.path)
+        route = None
+        fid = ""
+        if m is not None:
+            fid_m: str | None = m.group("fid")
+            info_m: str | None = m.group("info")
+            kind = "info" if info_m else "fid" if fid_m else "root"
+            route = self._routes.get((request.method, kind))
+            fid = fid_m or ""
+        if route is None:
+            return _err("unhandled")
+        return route(request, fid)
 
 
 def _mock_transport(store: _MemStore, expect_key: str) -> httpx.MockTransport:
@@ -237,7 +290,7 @@ def test_client_upload_head_download(tmp_path: Path) -> None:
     store = _MemStore()
     client = _client_with_transport(_mock_transport(store, expect_key="k"))
 
-    payload = b"hello" * 1000
+    payload = _P_HELLO5K
     # Pre-populate to sidestep multipart parsing in mock
     store.put("abcd1234", payload, "text/plain")
     up = client.upload("abcd1234", io.BytesIO(payload), content_type="text/plain")
@@ -245,16 +298,17 @@ def test_client_upload_head_download(tmp_path: Path) -> None:
 
     head = client.head("abcd1234")
     assert head.size == len(payload)
-    assert head.etag == sha256(payload).hexdigest()
+    assert head.etag == _hex(payload)
 
     dest = tmp_path / "file.bin"
     client.download_to_path("abcd1234", dest)
-    assert dest.read_bytes() == payload
+    _assert_file_eq(dest, payload)
 
 
 def test_client_resume_and_verify(tmp_path: Path) -> None:
     store = _MemStore()
-    data = os.urandom(128 * 1024)
+    # Seeded userspace PRNG: the test needs varied bytes, not CSPRNG output
+    data = random.Random(0xC0FFEE).randbytes(128 * 1024)
     store.put("deadbeef", data, "application/octet-stream")
     client = _client_with_transport(_mock_transport(store, expect_key="k"))
 
@@ -263,16 +317,16 @@ def test_client_resume_and_verify(tmp_path: Path) -> None:
     dest.write_bytes(data[:10_000])
     head = client.download_to_path("deadbeef", dest, resume=True)
     assert head.size == len(data)
-    assert dest.read_bytes() == data
+    _assert_file_eq(dest, data)
 
 
 def test_client_416_and_404_errors(tmp_path: Path) -> None:
     store = _MemStore()
-    store.put("aa11bb22", b"x" * 10, "application/octet-stream")
+    store.put("aa11bb22", _P_X10, "application/octet-stream")
     client = _client_with_transport(_mock_transport(store, expect_key="k"))
 
     dest = tmp_path / "d.bin"
-    dest.write_bytes(b"z" * 100)
+    dest.write_bytes(_P_Z100)
     with pytest.raises(RangeNotSatisfiableError):
         client.download_to_path("aa11bb22", dest, resume=True)
 
@@ -326,23 +380,23 @@ def test_download_stream_error_branch(tmp_path: Path) -> None:
 
 def test_download_no_verify_branch(tmp_path: Path) -> None:
     store = _MemStore()
-    data = b"m" * 64
+    data = _P_M64
     store.put("nv", data, "application/octet-stream")
     client = _client_with_transport(_mock_transport(store, expect_key="k"))
     dest = tmp_path / "nv.bin"
     client.download_to_path("nv", dest, resume=False, verify_etag=False)
-    assert dest.read_bytes() == data
+    _assert_file_eq(dest, data)
 
 
 def test_client_delete_and_info(tmp_path: Path) -> None:
     store = _MemStore()
-    data = b"abc" * 10
+    data = _P_ABC30
     store.put("ff00aa11", data, "text/plain")
     client = _client_with_transport(_mock_transport(store, expect_key="k"))
 
     info = client.info("ff00aa11")
     assert info["size"] == len(data)
-    assert info["sha256"] == sha256(data).hexdigest()
+    assert info["sha256"] == _hex(data)
 
     # delete existing
     client.delete("ff00aa11")
@@ -386,7 +440,7 @@ def test_client_upload_unauthorized() -> None:
 
 def test_client_resume_already_complete(tmp_path: Path) -> None:
     store = _MemStore()
-    data = b"z" * 1024
+    data = _P_Z1K
     store.put("c1", data, "application/octet-stream")
     client = _client_with_transport(_mock_transport(store, expect_key="k"))
     dest = tmp_path / "c1.bin"
@@ -399,7 +453,7 @@ def test_client_resume_already_complete(tmp_path: Path) -> None:
 
 def test_client_already_complete_no_verify(tmp_path: Path) -> None:
     store = _MemStore()
-    data = b"q" * 256
+    data = _P_Q256
     store.put("c2", data, "application/octet-stream")
     client = _client_with_transport(_mock_transport(store, expect_key="k"))
     dest = tmp_path / "c2.bin"
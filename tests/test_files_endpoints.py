@@ -1,33 +1,25 @@
 from __future__ import annotations
 
-import io
 import json
 from hashlib import sha256
-from pathlib import Path
 
 import pytest
 from fastapi.testclient import TestClient
 
-from data_bank_api.app import create_app
-from data_bank_api.config import Settings
 from data_bank_api.storage import Storage, StorageError
 
+# Built once per module; httpx takes bytes directly for multipart parts
+_P_HW11K = b"hello world" * 1000
 
-def _client(tmp_path: Path) -> TestClient:
-    root = tmp_path / "files"
-    s = Settings(data_root=str(root), min_free_gb=0)
-    return TestClient(create_app(s))
 
-
-def test_upload_head_get_delete_roundtrip(tmp_path: Path) -> None:
-    client = _client(tmp_path)
-    payload = b"hello world" * 1000
+def test_upload_head_get_delete_roundtrip(client: TestClient) -> None:
+    payload = _P_HW11K
     _ = sha256(payload).hexdigest()
 
     # upload
     resp = client.post(
         "/files",
-        files={"file": ("abcd1234", io.BytesIO(payload), "text/plain")},
+        files={"file": ("abcd1234", payload, "text/plain")},
     )
     # fastapi may return 200 or 201 depending on model; accept either
     assert resp.status_code in (200, 201)
@@ -48,6 +40,7 @@ def test_upload_head_get_delete_roundtrip(tmp_path: Path) -> None:
     r4 = client.get(f"/files/{fid}", headers={"Range": "bytes=5-15"})
     assert r4.status_code == 206
     assert r4.content == payload[5:16]
+    assert r4.headers["Content-Range"] == f"bytes 5-15/{len(payload)}"
     # headers include ETag and Content-Type on partial content
     headers_map: dict[str, str] = {str(k).lower(): str(v) for (k, v) in r4.headers.items()}
     assert "etag" in headers_map
@@ -73,18 +66,19 @@ def test_upload_head_get_delete_roundtrip(tmp_path: Path) -> None:
 
 
 def test_upload_400_bad_request_on_storage_error(
-    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
 ) -> None:
     # Monkeypatch Storage.save_stream to raise StorageError
-    client = _client(tmp_path)
 
-    def _boom(self: Storage, stream: object, content_type: str) -> object:
+    def _boom(
+        self: Storage, stream: object, content_type: str, *, size_hint: int | None = None
+    ) -> object:
         raise StorageError("boom")
 
     monkeypatch.setattr(Storage, "save_stream", _boom)
     resp = client.post(
         "/files",
-        files={"file": ("x.txt", io.BytesIO(b"x"), "text/plain")},
+        files={"file": ("x.txt", b"x", "text/plain")},
     )
     assert resp.status_code == 400
     body: dict[str, object] = json.loads(resp.text)
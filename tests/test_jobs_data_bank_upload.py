@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 from collections.abc import Iterator
 from pathlib import Path
-from typing import Final
+from typing import BinaryIO, Final
 
 import pytest
 
@@ -75,7 +75,7 @@ def test_jobs_uploads_to_data_bank_and_sets_file_id(
 
     monkeypatch.setattr("api.jobs.LocalCorpusService", _Svc)
 
-    # Mock httpx.post to simulate data-bank-api upload success
+    # Fake HTTP client to simulate data-bank-api upload success
     class _Resp:
         def __init__(self, code: int, body: dict[str, object]) -> None:
             self.status_code = code
@@ -84,23 +84,22 @@ def test_jobs_uploads_to_data_bank_and_sets_file_id(
     captured_url: str = ""
     captured_headers: dict[str, str] = {}
     captured_files_key: str = ""
-
-    def _post(
-        url: str,
-        *,
-        headers: dict[str, str],
-        files: dict[str, object],
-        timeout: float,
-    ) -> _Resp:
-        nonlocal captured_url, captured_headers, captured_files_key
-        captured_url = url
-        captured_headers = headers
-        captured_files_key = next(iter(files.keys()))
-        return _Resp(201, {"file_id": "deadbeef"})
-
-    import api.jobs as jobs_mod
-
-    monkeypatch.setattr(jobs_mod.httpx, "post", _post)
+    captured_body: bytes = b""
+
+    class _Client:
+        def post(
+            self,
+            url: str,
+            *,
+            headers: dict[str, str],
+            files: dict[str, tuple[str, BinaryIO, str]],
+        ) -> _Resp:
+            nonlocal captured_url, captured_headers, captured_files_key, captured_body
+            captured_url = url
+            captured_headers = headers
+            captured_files_key = next(iter(files.keys()))
+            captured_body = files[captured_files_key][1].read()
+            return _Resp(201, {"file_id": "deadbeef"})
 
     # Redis in-memory
     r = _Redis()
@@ -120,10 +119,12 @@ def test_jobs_uploads_to_data_bank_and_sets_file_id(
         redis=r,
         settings=s,
         logger=log,
+        client=_Client(),
     )
 
     # Assert output path created and upload endpoint invoked
-    assert (tmp_path / "results" / f"{job_id}.txt").exists()
+    assert (tmp_path / "results" / f"{job_id}.txt").read_bytes() == b"a\nb\nc\n"
+    assert captured_body == b"a\nb\nc\n"
     assert captured_url.endswith("/files") and captured_headers["X-API-Key"] == "K"
     # file_id persisted in redis
     data = r.hgetall(f"job:{job_id}")
@@ -163,17 +164,19 @@ def test_jobs_upload_handles_missing_file_id(
             self.status_code = code
             self.text = json.dumps(body)
 
-    # Respond without file_id
-    def _post2(
-        url: str,
-        *,
-        headers: dict[str, str],
-        files: dict[str, object],
-        timeout: float,
-    ) -> _Resp:
-        return _Resp(200, {"ok": True})
+    # Respond without file_id; the shared module client is replaced so the
+    # default (no ``client=``) path is exercised.
+    class _Client2:
+        def post(
+            self,
+            url: str,
+            *,
+            headers: dict[str, str],
+            files: dict[str, tuple[str, BinaryIO, str]],
+        ) -> _Resp:
+            return _Resp(200, {"ok": True})
 
-    monkeypatch.setattr("api.jobs.httpx.post", _post2)
+    monkeypatch.setattr("api.jobs._HTTP_CLIENT", _Client2())
 
     r = _Redis()
     s = _settings(tmp_path, url="http://db", key="K")
@@ -194,3 +197,79 @@ def test_jobs_upload_handles_missing_file_id(
     data = r.hgetall("job:job-2")
     assert "file_id" not in data
     assert out["status"] == "completed"
+
+
+def test_jobs_reuse_the_shared_client_across_jobs(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    def _noop_ensure(
+        *,
+        source: str,
+        language: str,
+        data_dir: str,
+        max_sentences: int,
+        transliterate: bool,
+        confidence_threshold: float,
+    ) -> None:
+        return None
+
+    monkeypatch.setattr("core.corpus_download.ensure_corpus_file", _noop_ensure)
+
+    class _Svc:
+        def __init__(self, _data_dir: str) -> None:
+            pass
+
+        def stream(self, _spec: object) -> Iterator[str]:
+            yield from ["x"]
+
+    monkeypatch.setattr("api.jobs.LocalCorpusService", _Svc)
+
+    class _Resp:
+        def __init__(self, file_id: str) -> None:
+            body: dict[str, str] = {"file_id": file_id}
+            self.text = json.dumps(body)
+
+    class _RecordingClient:
+        def __init__(self) -> None:
+            self.uploads: list[str] = []
+
+        def post(
+            self,
+            url: str,
+            *,
+            headers: dict[str, str],
+            files: dict[str, tuple[str, BinaryIO, str]],
+        ) -> _Resp:
+            self.uploads.append(files["file"][0])
+            return _Resp(f"id{len(self.uploads)}")
+
+    shared = _RecordingClient()
+    monkeypatch.setattr("api.jobs._HTTP_CLIENT", shared)
+    r = _Redis()
+    s = _settings(tmp_path, url="http://db", key="K")
+    for job_id in ("job-a", "job-b"):
+        process_corpus_impl(
+            job_id,
+            params={
+                "source": "oscar",
+                "language": "kk",
+                "max_sentences": 1,
+                "transliterate": False,
+                "confidence_threshold": 0.9,
+            },
+            redis=r,
+            settings=s,
+            logger=_FakeLogger(),
+        )
+    # Both jobs went through the one module-level client, in order
+    assert shared.uploads == ["job-a.txt", "job-b.txt"]
+    assert r.hgetall("job:job-b") == {"file_id": "id2"}
+
+
+def test_encode_chunks_batches_lines(monkeypatch: pytest.MonkeyPatch) -> None:
+    import api.jobs as jobs_mod
+
+    monkeypatch.setattr(jobs_mod, "_WRITE_CHUNK_BYTES", 4)
+    chunks = list(jobs_mod._encode_chunks(iter(["ab", "c", "d", "é"])))
+    assert chunks == [b"ab\nc\n", "d\né\n".encode()]
+    assert list(jobs_mod._encode_chunks(iter(()))) == []
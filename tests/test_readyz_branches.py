@@ -57,3 +57,49 @@ def test_readyz_degraded_when_low_disk(tmp_path: Path, monkeypatch: MonkeyPatch)
     assert r.status_code == 503
 
     assert "low disk" in r.text
+
+
+def test_readyz_reuses_result_within_ttl(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    client = _client(tmp_path, min_free_gb=0)
+    (tmp_path / "files").mkdir(parents=True, exist_ok=True)
+    calls: list[Path] = []
+
+    def _counting(path: Path) -> bool:
+        calls.append(path)
+        return True
+
+    monkeypatch.setattr("data_bank_api.app._is_writable", _counting)
+    monkeypatch.setattr("data_bank_api.app._READY_TTL_S", 60.0)
+    assert client.get("/readyz").status_code == 200
+    first = len(calls)
+    assert client.get("/readyz").status_code == 200
+    assert len(calls) == first
+    monkeypatch.setattr("data_bank_api.app._READY_TTL_S", 0.0)
+    assert client.get("/readyz").status_code == 200
+    assert len(calls) > first
+
+
+class _FakeProbe:
+    def __init__(self, writable: bool, free: float) -> None:
+        self.writable = writable
+        self.free = free
+        self.calls = 0
+
+    def is_writable(self, path: Path) -> bool:
+        self.calls += 1
+        return self.writable
+
+    def free_gb(self, path: Path) -> float:
+        return self.free
+
+
+def test_readyz_uses_injected_probe(tmp_path: Path) -> None:
+    s = Settings(data_root=str(tmp_path / "files"), min_free_gb=5)
+    probe = _FakeProbe(writable=True, free=1.0)
+    client = TestClient(create_app(s, probe=probe))
+    r = client.get("/readyz")
+    assert r.status_code == 503
+    assert "low disk" in r.text
+    assert probe.calls == 1
+    # Nothing was created on disk: the fake stood in for the filesystem checks
+    assert not (tmp_path / "files").exists()
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import hashlib
 from pathlib import Path
 
+from _pytest.capture import CaptureFixture
 from _pytest.monkeypatch import MonkeyPatch
 from scripts.guards import pattern_guard as guard
 
@@ -33,6 +35,38 @@ def test_guard_detects_forbidden_patterns(tmp_path: Path) -> None:
     assert len(errs) >= 3
 
 
+def test_combined_first_byte_gate_keeps_every_rule(tmp_path: Path) -> None:
+    # One sample per rule in PATTERNS order, assembled so this file does not
+    # trip the guard itself
+    samples = [
+        "x = typing." + "An" + "y\n",
+        "from typing import " + "An" + "y\n",
+        "x: " + "An" + "y\n",
+        "x = 1  # type" + ": ign" + "ore\n",
+        "typing." + "ca" + "st(int, x)\n",
+        "# TO" + "DO\n",
+        "# FIX" + "ME\n",
+        "# HA" + "CK\n",
+        "# XX" + "X\n",
+        "# WI" + "P\n",
+        "logging.basic" + "Config()\n",
+        "x = 1  # no" + "qa\n",
+        "SUP" + "PRESS\n",
+        "pri" + "nt(1)\n",
+    ]
+    assert len(samples) == len(guard.PATTERNS)
+    for name, text in zip(guard.PATTERNS, samples, strict=True):
+        lib = tmp_path / "lib.py"
+        lib.write_text(text, encoding="utf-8")
+        assert any(e.endswith(f": {name}") for e in guard.scan_file(lib)), name
+    # Each rule's own pattern only ever starts on a gated byte
+    for text in samples:
+        data = text.encode()
+        for pattern in guard.PATTERNS.values():
+            for m in pattern.finditer(data):
+                assert data[m.start()] in guard.FIRST_BYTES
+
+
 def test_guard_detects_sup_helpers(tmp_path: Path) -> None:
     bad = tmp_path / "sup_helper.py"
     sup_kw = "".join(["sup", "ress"])  # assembled token to avoid repository guard
@@ -48,14 +82,21 @@ def test_iter_files_and_exclusions(tmp_path: Path) -> None:
     excl = tmp_path / "__pycache__"
     excl.mkdir()
     (excl / "in_cache.py").write_text("print(1)\n", encoding="utf-8")
+    git_dir = tmp_path / ".git"
+    git_dir.mkdir()
+    (git_dir / "hook.py").write_text("print(1)\n", encoding="utf-8")
 
     files = list(guard.iter_files([tmp_path]))
     assert tmp_path / "ok.py" in files
     assert tmp_path / "stub.pyi" in files
     assert tmp_path / "skip.txt" not in files
     assert (excl / "in_cache.py") not in files
+    assert (git_dir / "hook.py") not in files
     # Non-existent base path yields no files
     assert list(guard.iter_files([tmp_path / "missing_dir"])) == []
+    # Dangling symlinks are neither files nor directories and are skipped
+    (tmp_path / "dangling.py").symlink_to(tmp_path / "gone.py")
+    assert tmp_path / "dangling.py" not in list(guard.iter_files([tmp_path]))
 
 
 def test_scan_print_rule_library_vs_tests(tmp_path: Path) -> None:
@@ -128,3 +169,101 @@ def test_guard_run_guards_all_ok(monkeypatch: MonkeyPatch) -> None:
 def test_pattern_guard_main_entrypoint_runs() -> None:
     rc = guard.main()
     assert isinstance(rc, int)
+
+
+def test_run_reuses_cached_scan_results(tmp_path: Path, monkeypatch: MonkeyPatch) -> None:
+    bad = tmp_path / "bad.py"
+    bad.write_text("# " + "TO" + "DO" + ": x\n", encoding="utf-8")
+    monkeypatch.setattr(guard, "CACHE_FILE", tmp_path / "cache" / "pattern.json")
+
+    def _iter(_paths: list[Path]) -> list[Path]:
+        return [bad]
+
+    monkeypatch.setattr(guard, "iter_files", _iter)
+    assert guard.main() == 2
+
+    real_scan = guard.scan_file
+
+    def _unexpected_scan(_path: Path) -> list[str]:
+        raise AssertionError("unchanged file was rescanned")
+
+    monkeypatch.setattr(guard, "scan_file", _unexpected_scan)
+    assert guard.main() == 2
+
+    # A size change invalidates the entry and the file is scanned again
+    bad.write_text("x = 1\n", encoding="utf-8")
+    monkeypatch.setattr(guard, "scan_file", real_scan)
+    assert guard.main() == 0
+
+
+def test_load_cache_skips_malformed_entries(tmp_path: Path) -> None:
+    cache = tmp_path / "pattern.json"
+    assert guard._load_cache(cache) == {}
+    cache.write_text("[1, 2]", encoding="utf-8")
+    assert guard._load_cache(cache) == {}
+    cache.write_text(
+        '{"a.py": [1, 2, ["err", 3]], "b.py": [1, 2], "c.py": ["x", 2, []]}',
+        encoding="utf-8",
+    )
+    assert guard._load_cache(cache) == {"a.py": (1, 2, ["err"])}
+
+
+def test_cache_file_tracks_guard_source_and_prunes_stale(tmp_path: Path) -> None:
+    # The digest covers the whole module, not just PATTERNS
+    source = Path(guard.__file__).read_bytes()
+    assert guard.CACHE_FILE.name == f"pattern_{hashlib.sha256(source).hexdigest()[:16]}.json"
+    cache_dir = tmp_path / "guard"
+    cache_dir.mkdir()
+    (cache_dir / "pattern_v1_0123456789abcdef.json").write_text("{}", encoding="utf-8")
+    (cache_dir / "pattern_0000000000000000.json").write_text("{}", encoding="utf-8")
+    (cache_dir / "other.json").write_text("{}", encoding="utf-8")
+    current = cache_dir / "pattern_ffffffffffffffff.json"
+    guard._save_cache(current, {"a.py": (1, 2, [])})
+    assert sorted(p.name for p in cache_dir.iterdir()) == ["other.json", current.name]
+
+
+def test_save_cache_ignores_unwritable_location(tmp_path: Path) -> None:
+    blocker = tmp_path / "blocker"
+    blocker.write_text("", encoding="utf-8")
+    # Parent "directory" is a regular file, so mkdir fails with OSError
+    guard._save_cache(blocker / "pattern.json", {"a.py": (1, 2, [])})
+    assert blocker.is_file()
+
+
+def test_scan_many_uses_process_pool_above_threshold(
+    tmp_path: Path, monkeypatch: MonkeyPatch
+) -> None:
+    ok = tmp_path / "ok.py"
+    ok.write_text("x = 1\n", encoding="utf-8")
+    bad = tmp_path / "bad.py"
+    fix_kw = "".join(["FIX", "ME"])  # assembled token to avoid repository guard
+    bad.write_text(f"# {fix_kw}\n", encoding="utf-8")
+    serial = guard._scan_many([ok, bad])
+    monkeypatch.setattr(guard, "PARALLEL_MIN_FILES", 0)
+    parallel = guard._scan_many([ok, bad])
+    assert parallel == serial
+    assert parallel[0] == []
+    assert any(fix_kw in e for e in parallel[1])
+
+
+def test_scan_file_skips_binary_content(tmp_path: Path) -> None:
+    blob = tmp_path / "blob.py"
+    todo_kw = "".join(["TO", "DO"])  # assembled token to avoid repository guard
+    blob.write_bytes(b"\x00\x01" + f"# {todo_kw}\n".encode())
+    assert guard.scan_file(blob) == []
+
+
+def test_run_reports_and_skips_oversized_files(
+    tmp_path: Path, monkeypatch: MonkeyPatch, capsys: CaptureFixture[str]
+) -> None:
+    big = tmp_path / "big.py"
+    big.write_text(("# " + "TO" + "DO" + ": x\n") * 8, encoding="utf-8")
+    monkeypatch.setattr(guard, "CACHE_FILE", tmp_path / "cache" / "pattern.json")
+    monkeypatch.setattr(guard, "SIZE_LIMIT", 16)
+
+    def _iter(_paths: list[Path]) -> list[Path]:
+        return [big]
+
+    monkeypatch.setattr(guard, "iter_files", _iter)
+    assert guard.main() == 0
+    assert f"Guard skipped {big}" in capsys.readouterr().err
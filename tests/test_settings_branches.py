@@ -37,8 +37,8 @@ def test_blank_strings_fall_back_to_defaults(monkeypatch: MonkeyPatch) -> None:
 
 
 def test_delete_strict_truthy_and_falsy_variants(monkeypatch: MonkeyPatch) -> None:
-    truthy = ["1", "true", "TRUE", "TrUe", "yes", "YeS"]
-    falsy = ["0", "false", "FALSE", "fAlSe", "no", "  ", "nO"]
+    truthy = ["1", "true", "TRUE", "TrUe", "yes", "YeS", "y", "On", " true "]
+    falsy = ["0", "false", "FALSE", "fAlSe", "no", "  ", "nO", "n", "OFF", "maybe"]
 
     for v in truthy:
         monkeypatch.setenv("DELETE_STRICT_404", v)
@@ -110,3 +110,13 @@ def test_invalid_integers_raise(monkeypatch: MonkeyPatch) -> None:
         pass
     else:
         raise AssertionError("Expected ValueError for invalid MAX_FILE_BYTES")
+
+
+def test_from_env_reuses_instance_until_env_changes(monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setenv("DATA_ROOT", "/tmp/cache-a")
+    first = Settings.from_env()
+    assert Settings.from_env() is first
+    monkeypatch.setenv("DATA_ROOT", "/tmp/cache-b")
+    second = Settings.from_env()
+    assert second is not first
+    assert second.data_root == "/tmp/cache-b"
@@ -1,16 +1,30 @@
 from __future__ import annotations
 
+import hashlib
 import io
+import logging
 import os
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, tzinfo
 from pathlib import Path
+from typing import NamedTuple
 
 import pytest
+from typing_extensions import Buffer
 
 from data_bank_api.storage import (
+    _FADV_SEQUENTIAL,
+    FileTooLargeError,
     InsufficientStorageError,
     Storage,
     StorageError,
     StoredFileNotFoundError,
+    _fadvise,
+    _fallocate,
+    _is_hex,
+    _new_sha256,
+    _read_chunks,
 )
 
 
@@ -62,7 +76,9 @@ def _raise_oserror_unlink(*_args: object, **_kwargs: object) -> None:
 
 def test_save_stream_cleanup_unlink(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
     s = _storage(tmp_path)
-    # force os.replace to raise so tmp file remains for cleanup
+    # use the named mkstemp path, then force os.replace to raise so the tmp
+    # file remains for cleanup
+    monkeypatch.setattr("data_bank_api.storage._O_TMPFILE_FLAGS", 0)
     monkeypatch.setattr(os, "replace", _raise_oserror_fail)
     with pytest.raises(OSError):
         s.save_stream(io.BytesIO(b"data"), "text/plain")
@@ -73,6 +89,7 @@ def test_save_stream_cleanup_unlink(tmp_path: Path, monkeypatch: pytest.MonkeyPa
 
 def test_save_stream_cleanup_unlink_error(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
     s = _storage(tmp_path)
+    monkeypatch.setattr("data_bank_api.storage._O_TMPFILE_FLAGS", 0)
     monkeypatch.setattr(os, "replace", _raise_oserror_fail)
     # make unlink also fail to exercise except branch in cleanup
     monkeypatch.setattr(os, "unlink", _raise_oserror_unlink)
@@ -90,14 +107,14 @@ def test_insufficient_space_guard(tmp_path: Path, monkeypatch: pytest.MonkeyPatc
 def test_meta_path_invalid_file_id_raises(tmp_path: Path) -> None:
     s = _storage(tmp_path)
     with pytest.raises(StorageError):
-        _ = s._meta_path_for("zz")
+        _ = Path(s._meta_path_for("zz"))
 
 
 def test_head_fallback_without_sidecar(tmp_path: Path) -> None:
     s = _storage(tmp_path)
     meta = s.save_stream(io.BytesIO(b"abcdef"), "text/plain")
     # Remove sidecar to force fallback code path in head()
-    mpath = s._meta_path_for(meta.file_id)
+    mpath = Path(s._meta_path_for(meta.file_id))
     assert mpath.exists()
     mpath.unlink()
     info = s.head(meta.file_id)
@@ -109,7 +126,7 @@ def test_head_fallback_without_sidecar(tmp_path: Path) -> None:
 def test_read_sidecar_oserror_branch(tmp_path: Path) -> None:
     s = _storage(tmp_path)
     meta = s.save_stream(io.BytesIO(b"xyz"), "text/plain")
-    mpath = s._meta_path_for(meta.file_id)
+    mpath = Path(s._meta_path_for(meta.file_id))
     # Replace sidecar file with a directory to trigger OSError on open
     mpath.unlink()
     mpath.mkdir()
@@ -120,64 +137,34 @@ def test_read_sidecar_oserror_branch(tmp_path: Path) -> None:
 def test_meta_path_valid_return(tmp_path: Path) -> None:
     s = _storage(tmp_path)
     meta = s.save_stream(io.BytesIO(b"q"), "text/plain")
-    meta_path = s._meta_path_for(meta.file_id)
+    meta_path = Path(s._meta_path_for(meta.file_id))
     # Ensure helper returns the actual path
     assert meta_path.exists()
 
 
-def test_sidecar_replace_and_cleanup_unlink_error(
-    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
-) -> None:
+def test_sidecar_write_failure_propagates(tmp_path: Path) -> None:
     s = _storage(tmp_path)
-    # Patch os.replace and os.unlink to fail for meta temp files
-    real_replace = os.replace
-    real_unlink = os.unlink
-
-    def _replace(src: str, dst: str) -> None:
-        from pathlib import Path as PathMod
-
-        if PathMod(src).name.startswith("meta_"):
-            raise OSError("meta replace fail")
-        real_replace(src, dst)
-
-    def _unlink(path: str) -> None:
-        from pathlib import Path as PathMod
-
-        if PathMod(path).name.startswith("meta_"):
-            raise OSError("meta unlink fail")
-        real_unlink(path)
-
-    monkeypatch.setattr(os, "replace", _replace)
-    monkeypatch.setattr(os, "unlink", _unlink)
+    # Occupy the sidecar path with a directory so opening it for write fails
+    fid = hashlib.sha256(b"sidecar").hexdigest()
+    Path(s._meta_path_for(fid)).mkdir(parents=True)
     # Metadata writes are mandatory; save_stream should fail if metadata fails
-    # Cleanup will also fail but should be silently handled
-    with pytest.raises(OSError, match="meta replace fail"):
+    with pytest.raises(IsADirectoryError):
         s.save_stream(io.BytesIO(b"sidecar"), "text/plain")
 
 
-def test_sidecar_cleanup_unlink_error_after_successful_save(
-    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
-) -> None:
+def test_sidecar_written_without_temp_files(tmp_path: Path) -> None:
     s = _storage(tmp_path)
-    real_unlink = os.unlink
-
-    def _unlink(path: str) -> None:
-        from pathlib import Path as PathMod
-
-        if PathMod(path).name.startswith("meta_"):
-            raise OSError("meta unlink fail")
-        real_unlink(path)
-
-    monkeypatch.setattr(os, "unlink", _unlink)
-    # Upload should succeed even if cleanup fails
     meta = s.save_stream(io.BytesIO(b"test"), "text/plain")
-    assert len(meta.sha256) == 64
+    parent = Path(s._meta_path_for(meta.file_id)).parent
+    assert sorted(p.suffix for p in parent.iterdir()) == [".bin", ".meta"]
+    text = Path(s._meta_path_for(meta.file_id)).read_text(encoding="utf-8")
+    assert text.startswith(f"sha256={meta.file_id}\ncontent_type=text/plain\n")
 
 
 def test_sidecar_present_but_invalid_values(tmp_path: Path) -> None:
     s = _storage(tmp_path)
     meta = s.save_stream(io.BytesIO(b"abcdef"), "text/plain")
-    mpath = s._meta_path_for(meta.file_id)
+    mpath = Path(s._meta_path_for(meta.file_id))
     # Write invalid sidecar values to exercise negative branches
     mpath.write_text("sha256=z\ncontent_type=\ncreated_at=\n", encoding="utf-8")
     info = s.head(meta.file_id)
@@ -188,7 +175,7 @@ def test_sidecar_present_but_invalid_values(tmp_path: Path) -> None:
 def test_sidecar_present_empty_file(tmp_path: Path) -> None:
     s = _storage(tmp_path)
     meta = s.save_stream(io.BytesIO(b"abcdef"), "text/plain")
-    mpath = s._meta_path_for(meta.file_id)
+    mpath = Path(s._meta_path_for(meta.file_id))
     # Overwrite sidecar with empty content to exercise zero-iteration branch
     mpath.write_text("", encoding="utf-8")
     info = s.head(meta.file_id)
@@ -199,7 +186,7 @@ def test_sidecar_present_empty_file(tmp_path: Path) -> None:
 def test_sidecar_present_unrelated_line(tmp_path: Path) -> None:
     s = _storage(tmp_path)
     meta = s.save_stream(io.BytesIO(b"abcdef"), "text/plain")
-    mpath = s._meta_path_for(meta.file_id)
+    mpath = Path(s._meta_path_for(meta.file_id))
     # Sidecar contains an unrelated line to exercise no-op branch in loop
     mpath.write_text("ignored=1\n", encoding="utf-8")
     info = s.head(meta.file_id)
@@ -210,8 +197,8 @@ def test_sidecar_present_unrelated_line(tmp_path: Path) -> None:
 def test_delete_removes_blob_and_sidecar(tmp_path: Path) -> None:
     s = _storage(tmp_path)
     meta = s.save_stream(io.BytesIO(b"abcdef"), "text/plain")
-    path = s._path_for(meta.file_id)
-    meta_path = s._meta_path_for(meta.file_id)
+    path = Path(s._path_for(meta.file_id))
+    meta_path = Path(s._meta_path_for(meta.file_id))
     assert path.exists()
     assert meta_path.exists()
 
@@ -225,8 +212,8 @@ def test_delete_removes_blob_and_sidecar(tmp_path: Path) -> None:
 def test_delete_cleans_stale_sidecar(tmp_path: Path) -> None:
     s = _storage(tmp_path)
     meta = s.save_stream(io.BytesIO(b"abcdef"), "text/plain")
-    path = s._path_for(meta.file_id)
-    meta_path = s._meta_path_for(meta.file_id)
+    path = Path(s._path_for(meta.file_id))
+    meta_path = Path(s._meta_path_for(meta.file_id))
     # Simulate blob missing but sidecar present
     path.unlink()
     assert not path.exists()
@@ -236,3 +223,496 @@ def test_delete_cleans_stale_sidecar(tmp_path: Path) -> None:
 
     assert deleted is True
     assert not meta_path.exists()
+
+
+def test_new_sha256_matches_hashlib() -> None:
+    h = _new_sha256()
+    h.update(b"abc")
+    assert h.hexdigest() == hashlib.sha256(b"abc").hexdigest()
+
+
+def test_head_rehashes_non_sha_file_id(tmp_path: Path) -> None:
+    s = _storage(tmp_path)
+    path = Path(s._path_for("abcd1234"))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"legacy")
+    info = s.head("ABCD1234")
+    assert info.file_id == "abcd1234"
+    assert info.sha256 == hashlib.sha256(b"legacy").hexdigest()
+    # A valid sidecar digest is used as-is for non-sha ids (fresh instance,
+    # since the sidecar is edited out of band and metadata is cached)
+    Path(s._meta_path_for("abcd1234")).write_text("sha256=" + "e" * 64 + "\n", encoding="utf-8")
+    assert _storage(tmp_path).head("abcd1234").sha256 == "e" * 64
+
+
+def test_head_trusts_sha_file_id_over_sidecar(tmp_path: Path) -> None:
+    s = _storage(tmp_path)
+    meta = s.save_stream(io.BytesIO(b"abcdef"), "text/plain")
+    Path(s._meta_path_for(meta.file_id)).write_text("sha256=" + "0" * 64 + "\n", encoding="utf-8")
+    assert s.head(meta.file_id).sha256 == meta.file_id
+
+
+def test_is_hex_accepts_only_lowercase_ascii_hex() -> None:
+    assert _is_hex("0123456789abcdef")
+    assert _is_hex("")
+    assert not _is_hex("ABCDEF")
+    assert not _is_hex("abcg")
+    assert not _is_hex("ab\u0661")
+
+
+class _ReadOnlyStream:
+    def __init__(self, data: bytes) -> None:
+        self._buf = io.BytesIO(data)
+
+    def read(self, size: int = -1, /) -> bytes:
+        return self._buf.read(size)
+
+
+def test_read_chunks_reuses_buffer_or_falls_back_to_read() -> None:
+    bufs = (memoryview(bytearray(4)), memoryview(bytearray(4)))
+    views = list(_read_chunks(io.BytesIO(b"abcdefghij"), bufs))
+    # Consecutive chunks land in alternating buffers
+    owners = [v.obj for v in views if isinstance(v, memoryview)]
+    assert owners == [bufs[0].obj, bufs[1].obj, bufs[0].obj]
+    into = [bytes(c) for c in _read_chunks(io.BytesIO(b"abcdefghij"), bufs)]
+    assert into == [b"abcd", b"efgh", b"ij"]
+    plain = [bytes(c) for c in _read_chunks(_ReadOnlyStream(b"abcdefghij"), bufs)]
+    assert plain == into
+
+
+def test_save_stream_empty_upload(tmp_path: Path) -> None:
+    s = _storage(tmp_path)
+    meta = s.save_stream(io.BytesIO(b""), "text/plain")
+    assert meta.size_bytes == 0
+    assert meta.file_id == hashlib.sha256(b"").hexdigest()
+
+
+def test_save_stream_streams_bodies_above_small_threshold(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("data_bank_api.storage._SMALL_UPLOAD_BYTES", 2)
+    monkeypatch.setattr("data_bank_api.storage._CHUNK_BYTES", 4)
+    s = _storage(tmp_path)
+    data = b"0123456789abcdef"
+    meta = s.save_stream(io.BytesIO(data), "text/plain")
+    assert meta.size_bytes == len(data)
+    assert meta.file_id == hashlib.sha256(data).hexdigest()
+    with open(s._path_for(meta.file_id), "rb") as f:
+        assert f.read() == data
+
+
+class _TricklingStream(io.BytesIO):
+    """Returns at most ``step`` bytes per call, like a raw or socket stream."""
+
+    def __init__(self, data: bytes, step: int) -> None:
+        super().__init__(data)
+        self._step = step
+
+    def read(self, size: int | None = -1, /) -> bytes:
+        cap = self._step if size is None or size < 0 else min(size, self._step)
+        return super().read(cap)
+
+    def readinto(self, buffer: Buffer, /) -> int:
+        return super().readinto(memoryview(buffer)[: self._step])
+
+
+@pytest.mark.parametrize("length", [0, 999, 1000, 65 * 1024, 100 * 1024])
+def test_save_stream_short_reads_are_not_eof(tmp_path: Path, length: int) -> None:
+    s = _storage(tmp_path)
+    data = bytes(range(256)) * (length // 256) + b"x" * (length % 256)
+    meta = s.save_stream(_TricklingStream(data, 1000), "text/plain")
+    assert meta.size_bytes == length
+    assert meta.file_id == hashlib.sha256(data).hexdigest()
+    assert Path(s._path_for(meta.file_id)).read_bytes() == data
+
+
+def test_save_stream_rejects_oversized_stream_mid_copy(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("data_bank_api.storage._SMALL_UPLOAD_BYTES", 2)
+    monkeypatch.setattr("data_bank_api.storage._CHUNK_BYTES", 4)
+    s = Storage(root=tmp_path / "files", min_free_gb=0, max_file_bytes=8)
+    # The 3-byte head passes; the limit trips on a later chunk
+    with pytest.raises(FileTooLargeError):
+        s.save_stream(io.BytesIO(b"0123456789"), "text/plain")
+
+
+def test_storage_instances_share_one_writer_thread(tmp_path: Path) -> None:
+    a = Storage(root=tmp_path / "a", min_free_gb=0)
+    b = Storage(root=tmp_path / "b", min_free_gb=0)
+    assert a._writer is b._writer
+    assert a._writer._max_workers == 1
+
+
+class _FailingWriter:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def submit(self, fn: Callable[[Buffer], int], chunk: Buffer, /) -> Future[int]:
+        self.calls += 1
+        fut: Future[int] = Future()
+        fut.set_exception(OSError("disk full"))
+        return fut
+
+
+def test_save_stream_write_error_propagates_and_cleans_up(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import data_bank_api.storage as storage_mod
+
+    monkeypatch.setattr(storage_mod, "_CHUNK_BYTES", 2)
+    monkeypatch.setattr(storage_mod, "_SMALL_UPLOAD_BYTES", 0)
+    monkeypatch.setattr(storage_mod, "_O_TMPFILE_FLAGS", 0)
+    s = _storage(tmp_path)
+    writer = _FailingWriter()
+    monkeypatch.setattr(s, "_writer", writer)
+    with pytest.raises(OSError, match="disk full"):
+        s.save_stream(io.BytesIO(b"abcdef"), "text/plain")
+    # The failed write surfaces on the next chunk; no further writes are queued
+    assert writer.calls == 1
+    assert not [p for p in (tmp_path / "files").iterdir() if p.name != ".layout"]
+
+
+def test_head_caches_metadata_until_blob_changes(tmp_path: Path) -> None:
+    s = _storage(tmp_path)
+    meta = s.save_stream(io.BytesIO(b"cached"), "text/plain")
+    first = s.head(meta.file_id)
+    # Served from the cache while neither blob nor sidecar changes
+    assert s.head(meta.file_id) is first
+    # Rewriting the sidecar in place changes its stamp
+    Path(s._meta_path_for(meta.file_id)).write_text("content_type=x/y\n", encoding="utf-8")
+    assert s.head(meta.file_id).content_type == "x/y"
+    # Re-uploading replaces the blob and invalidates the entry
+    s.save_stream(io.BytesIO(b"cached"), "application/json")
+    assert s.head(meta.file_id).content_type == "application/json"
+    # Delete drops the entry
+    assert s.delete(meta.file_id) is True
+    assert meta.file_id not in s._meta_cache
+
+
+def test_head_racing_sidecar_write_is_not_cached(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import data_bank_api.storage as storage_mod
+
+    s = _storage(tmp_path)
+    fid = hashlib.sha256(b"racy").hexdigest()
+    seen: list[str] = []
+
+    class _HeadFirst:
+        # save_stream stamps created_at right before writing the sidecar
+        @staticmethod
+        def now(tz: tzinfo) -> datetime:
+            seen.append(s.head(fid).content_type)
+            return datetime.now(tz=tz)
+
+    monkeypatch.setattr(storage_mod, "datetime", _HeadFirst)
+    s.save_stream(io.BytesIO(b"racy"), "text/csv")
+    monkeypatch.undo()
+    assert seen == ["application/octet-stream"]
+    info = s.head(fid)
+    assert (info.content_type, info.created_at is not None) == ("text/csv", True)
+
+
+def test_head_cache_evicts_least_recently_used(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("data_bank_api.storage._META_CACHE_MAX", 2)
+    s = _storage(tmp_path)
+    ids = [s.save_stream(io.BytesIO(bytes([i])), "text/plain").file_id for i in range(3)]
+    for fid in ids:
+        s.head(fid)
+    assert list(s._meta_cache) == ids[1:]
+
+
+def test_custom_layout_is_persisted_and_honored(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    root = tmp_path / "files"
+    s = Storage(root=root, min_free_gb=0, shard_depth=1, shard_width=3)
+    meta = s.save_stream(io.BytesIO(b"layout"), "text/plain")
+    fid = meta.file_id
+    assert (root / fid[:3] / f"{fid}.bin").is_file()
+    assert (root / ".layout").read_text(encoding="utf-8") == "depth=1\nwidth=3\n"
+    # The sentinel wins over constructor arguments on restart, with a warning
+    with caplog.at_level(logging.WARNING, logger="data_bank_api.storage"):
+        again = Storage(root=root, min_free_gb=0)
+    assert "2x2 requested but 1x3 in use (from .layout)" in caplog.text
+    assert again.head(fid).size_bytes == 6
+    with pytest.raises(StorageError):
+        again.head("ab")
+
+
+def test_legacy_root_without_sentinel_uses_two_by_two(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    root = tmp_path / "files"
+    legacy = root / "ab" / "cd" / "abcd.bin"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_bytes(b"old")
+    with caplog.at_level(logging.WARNING, logger="data_bank_api.storage"):
+        s = Storage(root=root, min_free_gb=0, shard_depth=1, shard_width=3)
+    assert "1x3 requested but 2x2 in use (from legacy shard dirs)" in caplog.text
+    assert Path(s._path_for("abcd")) == legacy
+    s.save_stream(io.BytesIO(b"new"), "text/plain")
+    assert (root / ".layout").read_text(encoding="utf-8") == "depth=2\nwidth=2\n"
+
+
+def test_fresh_root_with_non_shard_dirs_keeps_requested_layout(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    root = tmp_path / "files"
+    for name in ("lost+found", "zz", "abc"):
+        (root / name).mkdir(parents=True)
+    (root / "ab").write_bytes(b"")
+    with caplog.at_level(logging.WARNING, logger="data_bank_api.storage"):
+        s = Storage(root=root, min_free_gb=0, shard_depth=1, shard_width=3)
+    assert caplog.text == ""
+    s.save_stream(io.BytesIO(b"fresh"), "text/plain")
+    assert (root / ".layout").read_text(encoding="utf-8") == "depth=1\nwidth=3\n"
+
+
+@pytest.mark.parametrize("text", ["depth=x\nwidth=2\n", "width=2\n"])
+def test_invalid_layout_sentinel_raises(tmp_path: Path, text: str) -> None:
+    root = tmp_path / "files"
+    root.mkdir()
+    (root / ".layout").write_text(text, encoding="utf-8")
+    with pytest.raises(StorageError, match="invalid storage layout"):
+        Storage(root=root, min_free_gb=0)
+
+
+@pytest.mark.parametrize(("depth", "width"), [(0, 2), (2, 0), (9, 8)])
+def test_invalid_layout_arguments_raise(tmp_path: Path, depth: int, width: int) -> None:
+    with pytest.raises(StorageError, match="invalid storage layout"):
+        Storage(root=tmp_path / "files", min_free_gb=0, shard_depth=depth, shard_width=width)
+
+
+class _Usage(NamedTuple):
+    total: int
+    used: int
+    free: int
+
+
+def test_free_space_probe_is_reused_within_ttl(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: list[Path] = []
+    free = [10 * 1024**3]
+
+    def _usage(path: Path) -> _Usage:
+        calls.append(path)
+        return _Usage(free[0], 0, free[0])
+
+    monkeypatch.setattr("data_bank_api.storage.shutil.disk_usage", _usage)
+    s = Storage(root=tmp_path / "files", min_free_gb=1)
+    s.save_stream(io.BytesIO(b"one"), "text/plain")
+    s.save_stream(io.BytesIO(b"two"), "text/plain")
+    assert len(calls) == 1
+    # Writes that would push the estimate under the threshold force a re-probe
+    s._written_since_check = 9 * 1024**3 + 1
+    free[0] = 1024**3 - 1
+    with pytest.raises(InsufficientStorageError):
+        s.save_stream(io.BytesIO(b"three"), "text/plain")
+    assert len(calls) == 2
+    # A failing probe is never cached
+    with pytest.raises(InsufficientStorageError):
+        s.save_stream(io.BytesIO(b"four"), "text/plain")
+    assert len(calls) == 3
+
+
+def test_free_space_accounting_is_exact_under_concurrent_uploads(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def _usage(path: Path) -> _Usage:
+        return _Usage(10 * 1024**3, 0, 10 * 1024**3)
+
+    monkeypatch.setattr("data_bank_api.storage.shutil.disk_usage", _usage)
+    monkeypatch.setattr("data_bank_api.storage._FREE_SPACE_TTL_S", 3600.0)
+    s = Storage(root=tmp_path / "files", min_free_gb=1)
+    bodies = [b"%d" % i * (i + 1) for i in range(64)]
+
+    def _save(body: bytes) -> int:
+        return s.save_stream(io.BytesIO(body), "text/plain").size_bytes
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        sizes = list(pool.map(_save, bodies))
+    assert s._written_since_check == sum(sizes) == sum(map(len, bodies))
+
+
+def test_fadvise_ignores_errors() -> None:
+    # An invalid descriptor makes posix_fadvise fail; the hint is best-effort.
+    _fadvise(-1, _FADV_SEQUENTIAL)
+
+
+def test_fallocate_reports_failure() -> None:
+    assert _fallocate(-1, 16) is False
+
+
+def test_save_stream_preallocates_and_trims_to_actual_size(tmp_path: Path) -> None:
+    s = _storage(tmp_path)
+    # Hint larger than the stream: the reserved tail is truncated away
+    meta = s.save_stream(io.BytesIO(b"short"), "text/plain", size_hint=4096)
+    assert os.stat(s._path_for(meta.file_id)).st_size == 5
+    assert meta.file_id == hashlib.sha256(b"short").hexdigest()
+    # Exact hint: nothing to trim
+    exact = s.save_stream(io.BytesIO(b"exact"), "text/plain", size_hint=5)
+    assert os.stat(s._path_for(exact.file_id)).st_size == 5
+
+
+def test_preallocate_skips_missing_or_oversized_hints(tmp_path: Path) -> None:
+    s = Storage(root=tmp_path / "files", min_free_gb=0, max_file_bytes=8)
+    fd = os.open(tmp_path, os.O_RDONLY)
+    try:
+        # No reservation is attempted, so even a directory fd is never touched
+        assert s._preallocate(fd, None) == 0
+        assert s._preallocate(fd, 0) == 0
+        assert s._preallocate(fd, 9) == 0
+    finally:
+        os.close(fd)
+
+
+def test_open_range_large_span_reads_all(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("data_bank_api.storage._CHUNK_BYTES", 4)
+    monkeypatch.setattr("data_bank_api.storage._PREFETCH_SMALL_SPAN", 0)
+    s = _storage(tmp_path)
+    meta = s.save_stream(io.BytesIO(b"0123456789"), "text/plain")
+    it, start, last = s.open_range(meta.file_id, 1, None)
+    assert (start, last) == (1, 9)
+    assert b"".join(it) == b"123456789"
+    # A span within one chunk skips the sequential-read hint
+    assert b"".join(s.open_range(meta.file_id, 1, 3)[0]) == b"123"
+
+
+def _window(s: Storage, fid: str) -> tuple[int, bytes]:
+    offset, data, _, _ = s._range_prefetch[fid]
+    return offset, data
+
+
+def test_small_ranges_share_a_prefetch_window(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("data_bank_api.storage._PREFETCH_BYTES", 6)
+    s = _storage(tmp_path)
+    fid = s.save_stream(io.BytesIO(b"0123456789abcdef"), "text/plain").file_id
+    # A first probe keeps only the requested span
+    assert b"".join(s.open_range(fid, 0, 1)[0]) == b"01"
+    assert _window(s, fid) == (0, b"01")
+    # A request starting at the window end reads ahead
+    assert b"".join(s.open_range(fid, 2, 3)[0]) == b"23"
+    entry = s._range_prefetch[fid]
+    assert _window(s, fid) == (2, b"234567")
+    # Adjacent range inside the window is served without a new read
+    assert b"".join(s.open_range(fid, 4, 7)[0]) == b"4567"
+    assert s._range_prefetch[fid] is entry
+    # A jump elsewhere reads just its span again
+    assert b"".join(s.open_range(fid, 12, 13)[0]) == b"cd"
+    assert _window(s, fid) == (12, b"cd")
+    # Expired windows are neither reused nor extended
+    monkeypatch.setattr("data_bank_api.storage._PREFETCH_TTL_S", -1.0)
+    assert b"".join(s.open_range(fid, 8, 8)[0]) == b"8"
+    assert _window(s, fid) == (8, b"8")
+    entry = s._range_prefetch[fid]
+    assert b"".join(s.open_range(fid, 9, 9)[0]) == b"9"
+    assert _window(s, fid) == (9, b"9")
+    assert b"".join(s.open_range(fid, 9, 9)[0]) == b"9"
+    assert s._range_prefetch[fid] is not entry
+    s.delete(fid)
+    assert s._range_prefetch == {}
+
+
+def test_prefetch_windows_are_bounded(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("data_bank_api.storage._PREFETCH_MAX", 2)
+    s = _storage(tmp_path)
+    ids = [s.save_stream(io.BytesIO(bytes([i]) * 3), "text/plain").file_id for i in range(3)]
+    for fid in ids:
+        assert b"".join(s.open_range(fid, 0, 0)[0]) == bytes([ids.index(fid)])
+    assert list(s._range_prefetch) == ids[1:]
+
+
+def test_small_range_blob_removed_after_stat(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    s = _storage(tmp_path)
+    fid = s.save_stream(io.BytesIO(b"gone"), "text/plain").file_id
+
+    real_stat = Storage._stat_or_404
+
+    def _stat_then_remove(path: str, file_id: str) -> os.stat_result:
+        st = real_stat(path, file_id)
+        os.unlink(path)
+        return st
+
+    monkeypatch.setattr(Storage, "_stat_or_404", staticmethod(_stat_then_remove))
+    with pytest.raises(StoredFileNotFoundError):
+        s.open_range(fid, 0, 1)
+
+
+def test_non_regular_or_shadowed_blob_is_not_found(tmp_path: Path) -> None:
+    s = _storage(tmp_path)
+    # Blob path is a directory
+    Path(s._path_for("abcd0001")).mkdir(parents=True)
+    with pytest.raises(StoredFileNotFoundError):
+        s.head("abcd0001")
+    # A shard directory is shadowed by a regular file
+    shadow = Path(s._path_for("ef010001")).parent
+    shadow.parent.mkdir(parents=True)
+    shadow.write_bytes(b"")
+    with pytest.raises(StoredFileNotFoundError):
+        s.get_size("ef010001")
+
+
+def test_save_stream_uses_anonymous_tmpfile(tmp_path: Path) -> None:
+    s = _storage(tmp_path)
+    meta = s.save_stream(io.BytesIO(b"anon"), "text/plain")
+    assert Path(s._path_for(meta.file_id)).read_bytes() == b"anon"
+    assert list((tmp_path / "files").glob("upload_*")) == []
+    # Storing identical bytes again publishes a fresh inode over the old blob
+    ino = Path(s._path_for(meta.file_id)).stat().st_ino
+    again = s.save_stream(io.BytesIO(b"anon"), "text/plain")
+    assert again.file_id == meta.file_id
+    assert Path(s._path_for(meta.file_id)).stat().st_ino != ino
+    assert sorted(p.name for p in Path(s._path_for(meta.file_id)).parent.iterdir()) == [
+        f"{meta.file_id}.bin",
+        f"{meta.file_id}.meta",
+    ]
+
+
+def test_reupload_invalidates_other_instances(tmp_path: Path) -> None:
+    a, b = _storage(tmp_path), _storage(tmp_path)
+    fid = a.save_stream(io.BytesIO(b"shared"), "text/plain").file_id
+    assert b.head(fid).content_type == "text/plain"
+    a.save_stream(io.BytesIO(b"shared"), "application/json")
+    assert b.head(fid).content_type == "application/json"
+
+
+def test_reupload_replace_failure_removes_staged_link(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    s = _storage(tmp_path)
+    meta = s.save_stream(io.BytesIO(b"twice"), "text/plain")
+    monkeypatch.setattr(os, "replace", _raise_oserror_fail)
+    with pytest.raises(OSError, match="fail"):
+        s.save_stream(io.BytesIO(b"twice"), "text/plain")
+    monkeypatch.undo()
+    parent = Path(s._path_for(meta.file_id)).parent
+    assert sorted(p.name for p in parent.iterdir()) == [
+        f"{meta.file_id}.bin",
+        f"{meta.file_id}.meta",
+    ]
+
+
+def test_save_stream_falls_back_without_o_tmpfile(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    real_open = os.open
+
+    def _open(path: str, flags: int, mode: int = 0o777, **kwargs: int | None) -> int:
+        if flags & os.O_TMPFILE == os.O_TMPFILE:
+            raise IsADirectoryError(path)
+        return real_open(path, flags, mode)
+
+    monkeypatch.setattr(os, "open", _open)
+    s = _storage(tmp_path)
+    meta = s.save_stream(io.BytesIO(b"named"), "text/plain")
+    assert Path(s._path_for(meta.file_id)).read_bytes() == b"named"
+    assert list((tmp_path / "files").glob("upload_*")) == []